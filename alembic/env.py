@@ -23,6 +23,7 @@ if config.config_file_name is not None:
 # from myapp import mymodel
 # target_metadata = mymodel.Base.metadata
 from app.db.session import Base
+import app.models.spatial  # noqa: F401  (registers the models on Base.metadata)
 
 target_metadata = Base.metadata
 
@@ -66,7 +67,13 @@ def run_migrations_online() -> None:
     connectable = engine_from_config(
         config.get_section(config.config_ini_section, {}),
         prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
+        # Reason: a pooled, pre-pinged connection is kept warm for the whole
+        # migration run instead of reconnecting per checkout.
+        poolclass=pool.QueuePool,
+        pool_size=5,
+        max_overflow=10,
+        pool_pre_ping=True,
+        pool_recycle=1800,
     )
 
     with connectable.connect() as connection:
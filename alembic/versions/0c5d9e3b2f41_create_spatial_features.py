@@ -0,0 +1,41 @@
+"""create spatial_features
+
+Revision ID: 0c5d9e3b2f41
+Revises: 
+Create Date: 2026-10-15 08:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0c5d9e3b2f41'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Reason: IF NOT EXISTS, so databases whose table was created with
+    # create_all() before migrations existed upgrade cleanly.
+    op.execute("CREATE EXTENSION IF NOT EXISTS postgis")
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS spatial_features (
+            id SERIAL PRIMARY KEY,
+            created_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+            updated_at TIMESTAMP WITH TIME ZONE,
+            name VARCHAR NOT NULL,
+            description VARCHAR,
+            geometry geometry(GEOMETRY, 4326) NOT NULL
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_spatial_features_id ON spatial_features (id)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TABLE IF EXISTS spatial_features")
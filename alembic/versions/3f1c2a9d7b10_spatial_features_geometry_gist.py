@@ -0,0 +1,33 @@
+"""spatial_features geometry GiST index
+
+Revision ID: 3f1c2a9d7b10
+Revises: 0c5d9e3b2f41
+Create Date: 2026-10-15 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d7b10'
+down_revision: Union[str, None] = '0c5d9e3b2f41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Reason: same name GeoAlchemy2 uses for spatial_index=True, so databases
+    # created with create_all() already have it and this is a no-op there.
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_spatial_features_geometry "
+        "ON spatial_features USING GIST (geometry)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_spatial_features_geometry")
@@ -0,0 +1,69 @@
+"""table write counters for list ETags
+
+Revision ID: 8b4e6d2c1a57
+Revises: 3f1c2a9d7b10
+Create Date: 2026-10-15 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b4e6d2c1a57'
+down_revision: Union[str, None] = '3f1c2a9d7b10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Reason: same objects as app.crud.spatial.version_tracking_statements(),
+    # spelled out here so the migration does not change with the app code.
+    op.execute(
+        "CREATE TABLE IF NOT EXISTS public.table_versions "
+        "(table_oid oid PRIMARY KEY, version bigint NOT NULL)"
+    )
+    op.execute("""
+        CREATE OR REPLACE FUNCTION public.bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO public.table_versions (table_oid, version) VALUES (TG_RELID, 1)
+            ON CONFLICT (table_oid) DO UPDATE SET version = public.table_versions.version + 1;
+            RETURN NULL;
+        END
+        $$
+    """)
+    # Track every existing spatial table (spatial_features, API-created tables,
+    # imports); views with geometry columns cannot take these triggers
+    op.execute("""
+        DO $$
+        DECLARE
+            t text;
+        BEGIN
+            FOR t IN
+                SELECT DISTINCT cols.table_name FROM information_schema.columns cols
+                JOIN information_schema.tables tabs USING (table_schema, table_name)
+                WHERE cols.udt_name = 'geometry' AND cols.table_schema = 'public'
+                AND tabs.table_type = 'BASE TABLE'
+            LOOP
+                EXECUTE format('DROP TRIGGER IF EXISTS %I ON public.%I', t || '_version', t);
+                EXECUTE format(
+                    'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON public.%I '
+                    'FOR EACH STATEMENT EXECUTE FUNCTION public.bump_table_version()',
+                    t || '_version', t
+                );
+                INSERT INTO public.table_versions (table_oid, version)
+                VALUES (format('public.%I', t)::regclass, 1)
+                ON CONFLICT (table_oid) DO UPDATE SET version = public.table_versions.version + 1;
+            END LOOP;
+        END
+        $$
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP FUNCTION IF EXISTS public.bump_table_version() CASCADE")
+    op.execute("DROP TABLE IF EXISTS public.table_versions")
@@ -1,39 +1,65 @@
 """
 GeoPackage import endpoint for Orata API Backend.
 """
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Query
+from app.utils.responses import ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
 from starlette.status import HTTP_201_CREATED
 import os
 import tempfile
-import shutil
+import aiofiles
+from typing import Optional
 from app.crud import spatial as spatial_crud
 from sqlalchemy.orm import Session
 from app.db.session import get_db
+from app.api.spatial import spatial_tables
+from app.api.spatial_query import table_columns
 
 router = APIRouter(prefix="/import", tags=["import"])
 
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+
 @router.post("/geopackage/", status_code=HTTP_201_CREATED)
-async def import_geopackage(file: UploadFile = File(...), db: Session = Depends(get_db)):
+async def import_geopackage(
+    file: UploadFile = File(...),
+    bbox: Optional[str] = Query(None, description="Only import features intersecting minx,miny,maxx,maxy (layer CRS)"),
+    db: Session = Depends(get_db),
+):
     """
     Import a GeoPackage file, create a spatial table named after the file (without extension),
     and load its features into the database.
+    With bbox, only the features intersecting it are read (filtered by GDAL using the file's spatial index).
     """
     if not file.filename.lower().endswith('.gpkg'):
         raise HTTPException(status_code=400, detail="Only .gpkg files are supported.")
+    bounds = None
+    if bbox is not None:
+        try:
+            bounds = tuple(float(value) for value in bbox.split(","))
+        except ValueError:
+            bounds = None
+        if bounds is None or len(bounds) != 4:
+            raise HTTPException(status_code=422, detail="bbox must be four comma-separated numbers: minx,miny,maxx,maxy")
 
     table_name = os.path.splitext(os.path.basename(file.filename))[0]
-    with tempfile.NamedTemporaryFile(delete=False, suffix='.gpkg') as tmp:
-        shutil.copyfileobj(file.file, tmp)
-        tmp_path = tmp.name
-
-    try:
-        # You should implement this function in app/crud/spatial.py
-        # It should create the table and import features from the GeoPackage
-        # The CRUD function will now handle the deletion of tmp_path
-        spatial_crud.crud_spatial.import_geopackage_to_table(db, tmp_path, table_name)
-    except Exception as e:
-        # Don't remove tmp_path here anymore, it's handled in CRUD or might be needed for debugging
-        raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
-    # Don't remove tmp_path here anymore, it's handled in CRUD
-    return JSONResponse({"message": f"Imported {file.filename} as table '{table_name}'"}, status_code=HTTP_201_CREATED)
+    # The upload and everything written next to it are removed when this
+    # block exits, whether the import succeeded or not
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = os.path.join(tmp_dir, "upload.gpkg")
+        # Reason: stream the upload to disk in large async chunks so the event loop
+        # is not blocked copying the whole file through small synchronous buffers.
+        async with aiofiles.open(tmp_path, 'wb') as tmp:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await tmp.write(chunk)
+        try:
+            # Reason: the import is blocking GDAL/DB work; run it off the event loop.
+            await run_in_threadpool(spatial_crud.crud_spatial.import_geopackage_to_table, db, tmp_path, table_name, bounds)
+        except HTTPException:
+            # Already mapped by the importer (400 for unreadable or invalid data)
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Import failed: {str(e)}")
+    # The table was (re)created, so cached column lists may be stale
+    table_columns.cache_clear()
+    spatial_tables.cache_clear()
+    return ORJSONResponse({"message": f"Imported {file.filename} as table '{table_name}'"}, status_code=HTTP_201_CREATED)
@@ -1,59 +1,42 @@
 """
 Spatial API router for CRUD operations.
 """
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import SessionLocal
+from sqlalchemy import text
+from typing import List, Optional
+from app.db.session import SessionLocal, get_db, get_read_db
 from app.schemas.spatial import SpatialCreate, SpatialUpdate, SpatialOut
 from app.crud.spatial import crud_spatial
-
-router = APIRouter()
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
+from app.utils.responses import ORJSONResponse
+from geoalchemy2.elements import WKTElement
 from geoalchemy2.shape import to_shape
-from shapely.geometry import mapping
+import functools
+import time
+import numpy as np
+import orjson
+import shapely
 
-# ... (rest of imports and router setup)
+router = APIRouter(default_response_class=ORJSONResponse)
 
-
-def tuples_to_lists(obj):
-    if isinstance(obj, tuple):
-        return [tuples_to_lists(i) for i in obj]
-    if isinstance(obj, list):
-        return [tuples_to_lists(i) for i in obj]
-    if isinstance(obj, dict):
-        return {k: tuples_to_lists(v) for k, v in obj.items()}
-    return obj
-
-def serialize_spatial_feature(db_obj):
+def serialize_spatial_feature(db_obj, geom=None):
     """
     Convert a SpatialFeature SQLAlchemy object, dict, or any compatible object to a dict for SpatialOut schema.
-    Handles dicts (dynamic table), ORM objects, and namedtuples.
-    """
-    # Defensive: try dict, then attribute, then fallback
-    def get(field):
-        if isinstance(db_obj, dict):
-            return db_obj.get(field)
-        if hasattr(db_obj, field):
-            return getattr(db_obj, field)
-        # fallback for namedtuple or rowproxy
-        try:
-            return db_obj[field]
-        except Exception:
-            return None
-    geometry = get("geometry")
-    id_ = get("id")
-    name = get("name")
-    description = get("description")
-    geom = mapping(to_shape(geometry))
-    geom = tuples_to_lists(geom)
+    Handles dicts and Rows (dynamic table) and ORM objects.
+    An already rendered GeoJSON geometry dict can be passed as `geom` to skip decoding.
+    """
+    # Rows are read through their mapping; the accessor is chosen once per row
+    db_obj = getattr(db_obj, "_mapping", db_obj)
+    if hasattr(db_obj, "get"):
+        getter = db_obj.get
+    else:
+        getter = lambda field: getattr(db_obj, field, None)
+    id_, name, description, geometry = getter("id"), getter("name"), getter("description"), getter("geometry")
+    if geom is None:
+        # Decode WKB directly rather than through geoalchemy2's to_shape dispatch
+        shape = to_shape(geometry) if isinstance(geometry, WKTElement) else shapely.from_wkb(_wkb_data(geometry))
+        # GEOS's GeoJSON writer (C) instead of building coordinate tuples with mapping()
+        geom = orjson.loads(shapely.to_geojson(shape))
     return {
         "id": id_,
         "name": name,
@@ -61,13 +44,86 @@ def serialize_spatial_feature(db_obj):
         "geometry": geom,
     }
 
-import re
+def _wkb_data(geometry):
+    """
+    Raw WKB (bytes or hex string) of a geometry column value, as accepted by shapely.from_wkb.
+    """
+    data = getattr(geometry, "data", geometry)
+    return data if isinstance(data, (bytes, str)) else bytes(data)
+
+def serialize_spatial_features(db_objs):
+    """
+    Serialize many rows at once: all geometries are decoded with one vectorized
+    shapely.from_wkb call, written with one vectorized shapely.to_geojson call
+    and parsed back with a single orjson.loads of the joined array.
+    """
+    db_objs = list(db_objs)
+    if not db_objs:
+        return []
+    rows = [obj._mapping if hasattr(obj, "_mapping") else obj for obj in db_objs]
+    shapes = shapely.from_wkb(np.array([_wkb_data(row["geometry"]) for row in rows], dtype=object))
+    geoms = orjson.loads("[" + ",".join(shapely.to_geojson(shapes)) + "]")
+    return [serialize_spatial_feature(row, geom) for row, geom in zip(rows, geoms)]
+
+# Postgres truncates identifiers longer than this
+MAX_IDENTIFIER_LENGTH = 63
+
+# A miss refreshes spatial_tables() only if the cached set is at least this old
+SPATIAL_TABLES_MIN_AGE = 5.0  # seconds
+_spatial_tables_loaded_at = 0.0
+
+@functools.lru_cache(maxsize=1)
+def spatial_tables() -> frozenset:
+    """
+    Names of the public tables that have a geometry column.
+    Cached per process; call spatial_tables.cache_clear() after DDL that
+    creates, replaces or drops tables.
+    """
+    global _spatial_tables_loaded_at
+    _spatial_tables_loaded_at = time.monotonic()
+    sql = text("""
+        SELECT DISTINCT table_name
+        FROM information_schema.columns
+        WHERE udt_name = 'geometry' AND table_schema = 'public'
+    """)
+    with SessionLocal() as db:
+        return frozenset(row[0] for row in db.execute(sql))
 
 def validate_table_name(table_name: str) -> str:
-    if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", table_name):
+    # ASCII identifier (same as ^[a-zA-Z_][a-zA-Z0-9_]*$) checked in C without
+    # the regex engine; the pg_ prefix is reserved for system catalogs
+    if not (
+        table_name.isascii()
+        and table_name.isidentifier()
+        and len(table_name) <= MAX_IDENTIFIER_LENGTH
+        and not table_name.startswith("pg_")
+    ):
         raise HTTPException(status_code=400, detail="Invalid table name")
+    # Reason: only existing spatial tables are ever interpolated into SQL. A miss
+    # refreshes the cache, so tables created elsewhere (another worker,
+    # migrations) are picked up, but at most once per SPATIAL_TABLES_MIN_AGE:
+    # clients probing unknown names neither query the catalog on every request
+    # nor keep evicting the set other requests are reading. This process's own
+    # DDL routes clear the cache directly.
+    if table_name not in spatial_tables():
+        if time.monotonic() - _spatial_tables_loaded_at < SPATIAL_TABLES_MIN_AGE:
+            raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
+        spatial_tables.cache_clear()
+        if table_name not in spatial_tables():
+            raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found")
     return table_name
 
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header matches etag: "*", or any tag in the
+    comma-separated list, compared weakly (a W/ prefix is ignored).
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
 @router.post("/features/{table_name}/", response_model=SpatialOut, status_code=status.HTTP_201_CREATED)
 def create_feature(table_name: str, feature: SpatialCreate, db: Session = Depends(get_db)):
     """
@@ -78,16 +134,28 @@ def create_feature(table_name: str, feature: SpatialCreate, db: Session = Depend
     return serialize_spatial_feature(db_obj)
 
 @router.get("/features/{table_name}/", response_model=List[SpatialOut])
-def read_features(table_name: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_features(request: Request, table_name: str, skip: int = 0, limit: int = 100, db: Session = Depends(get_read_db)):
     """
     List spatial features in the specified table.
+    Responses from tracked tables carry an ETag built from the table's write
+    counter; a request whose If-None-Match matches it gets a 304 without
+    reading or serializing any rows.
     """
     table_name = validate_table_name(table_name)
+    version = crud_spatial.get_version(db, table_name=table_name)
+    headers = {}
+    if version is not None:
+        etag = f'"{version}-{skip}-{limit}"'
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        headers["ETag"] = etag
     db_objs = crud_spatial.get_multi(db, table_name=table_name, skip=skip, limit=limit)
-    return [serialize_spatial_feature(obj) for obj in db_objs]
+    # Returned directly: the dicts are built here, so re-validating every
+    # coordinate against SpatialOut is skipped (response_model documents the shape)
+    return ORJSONResponse(serialize_spatial_features(db_objs), headers=headers)
 
 @router.get("/features/{table_name}/{feature_id}", response_model=SpatialOut)
-def read_feature(table_name: str, feature_id: int, db: Session = Depends(get_db)):
+def read_feature(table_name: str, feature_id: int, db: Session = Depends(get_read_db)):
     """
     Get a spatial feature by ID from the specified table.
     """
@@ -103,10 +171,10 @@ def update_feature(table_name: str, feature_id: int, feature: SpatialUpdate, db:
     Update a spatial feature in the specified table.
     """
     table_name = validate_table_name(table_name)
-    db_obj = crud_spatial.get(db, feature_id, table_name=table_name)
-    if not db_obj:
+    # UPDATE ... RETURNING in one round trip; no row back means no such feature
+    updated = crud_spatial.update(db, {"id": feature_id}, feature, table_name=table_name)
+    if not updated:
         raise HTTPException(status_code=404, detail="Feature not found")
-    updated = crud_spatial.update(db, db_obj, feature, table_name=table_name)
     return serialize_spatial_feature(updated)
 
 @router.delete("/features/{table_name}/{feature_id}", response_model=SpatialOut)
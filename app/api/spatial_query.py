@@ -2,260 +2,299 @@
 Spatial query/filter endpoints for spatial_features table.
 """
 from fastapi import APIRouter, Depends, HTTPException, Body
-from sqlalchemy.orm import Session
-from sqlalchemy import text
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Connection, text
 from typing import List
-from app.db.session import SessionLocal, engine
+from app.db.session import SessionLocal, get_conn
 from app.schemas.spatial import SpatialOut
-from app.api.spatial import serialize_spatial_feature
-from geoalchemy2.shape import to_shape
-from shapely.geometry import mapping
+from app.api.spatial import validate_table_name
+from app.utils.responses import ORJSONResponse
+import functools
+import orjson
+import shapely
+import uuid
 import logging
 
 logger = logging.getLogger("spatial_query")
 
-# Patch: handle SQLAlchemy Row objects from raw SQL
+# Reason: PostGIS builds each feature's JSON (ST_AsGeoJSON + json_build_object),
+# so Python never decodes geometries or builds per-row dicts; rows are read
+# through a server-side cursor and streamed to the client in batches, keeping
+# memory bounded by the batch size rather than the result size.
+STREAM_BATCH_SIZE = 1000
 
-def tuples_to_lists(obj):
-    if isinstance(obj, tuple):
-        return [tuples_to_lists(i) for i in obj]
-    if isinstance(obj, list):
-        return [tuples_to_lists(i) for i in obj]
-    if isinstance(obj, dict):
-        return {k: tuples_to_lists(v) for k, v in obj.items()}
-    return obj
+# Cap on the page size a client may ask the bbox endpoint for; without a
+# "limit" the whole envelope is returned, as before pagination existed
+BBOX_MAX_LIMIT = 50000
 
-def serialize_spatial_row(row):
+def feature_sql(table_name: str) -> str:
     """
-    Convert a SQLAlchemy Row/tuple/ORM object to a GeoJSON Feature dictionary.
-    Handles ORM, Row, RowMapping results.
-    Robustly serializes PostGIS geometry columns.
-    Assumes 'id' and 'geometry' columns are present.
-    Optional 'name' and 'description' columns are handled safely.
+    SQL expression rendering one row as a SpatialOut JSON object (text).
+    """
+    return f"""
+        json_build_object(
+            'id', "{table_name}".id,
+            'name', "{table_name}".name,
+            'description', "{table_name}".description,
+            'geometry', ST_AsGeoJSON("{table_name}".geometry)::json
+        )::text
     """
-    from geoalchemy2.elements import WKBElement, WKTElement
-    from shapely.geometry.base import BaseGeometry
-    from shapely import wkb
-
-    # Use row._mapping for consistent access (works for ORM, Row, etc.)
-    data = row._mapping if hasattr(row, '_mapping') else row # Handle potential plain dicts too
 
-    # ID is assumed to exist after the import fix
-    id_ = data.get('id')
-    if id_ is None:
-        # This shouldn't happen if the import worked, but good to check
-        raise ValueError("Row is missing the mandatory 'id' column.")
+@functools.lru_cache(maxsize=256)
+def intersects_sql(table_name: str):
+    """
+    Features intersecting :wkb (also used by the within query).
+    The query statements are built once per table and reused across requests.
+    """
+    # Reason: the query geometry is decoded once in a CTE and the explicit &&
+    # lets the GiST index prune candidates by bounding box before ST_Intersects
+    return text(f"""
+        WITH q AS (SELECT ST_GeomFromWKB(:wkb, 4326) AS g)
+        SELECT {feature_sql(table_name)}
+        FROM "{table_name}", q
+        WHERE "{table_name}".geometry && q.g
+        AND ST_Intersects("{table_name}".geometry, q.g)
+    """)
 
-    # Geometry is also mandatory
-    geometry_col = data.get('geometry')
-    if geometry_col is None:
-         raise ValueError("Row is missing the mandatory 'geometry' column.")
+@functools.lru_cache(maxsize=256)
+def distance_sql(table_name: str):
+    """
+    Features within :distance meters of :wkb.
+    """
+    # Reason: no && prefilter on a degree box here: a distance in meters has no
+    # simple conservative bound in degrees near the poles or across the
+    # antimeridian. ST_DWithin on geography does its own index-assisted bounding
+    # test against the geography expression index.
+    return text(f"""
+        WITH q AS (SELECT ST_GeomFromWKB(:wkb, 4326)::geography AS geog)
+        SELECT {feature_sql(table_name)}
+        FROM "{table_name}", q
+        WHERE ST_DWithin(
+            "{table_name}".geometry::geography,
+            q.geog,
+            :distance
+        )
+    """)
 
-    # Get optional fields safely
-    name = data.get('name') # Defaults to None if missing
-    description = data.get('description') # Defaults to None if missing
+@functools.lru_cache(maxsize=256)
+def buffer_sql(table_name: str):
+    """
+    Features intersecting the :buffer meter buffer around :wkb.
+    """
+    # Reason: the buffer is computed once in a CTE, and the explicit && lets
+    # the GiST index prune candidates by bounding box before ST_Intersects
+    return text(f"""
+        WITH b AS (
+            SELECT ST_Buffer(ST_GeomFromWKB(:wkb, 4326)::geography, :buffer)::geometry AS g
+        )
+        SELECT {feature_sql(table_name)}
+        FROM "{table_name}", b
+        WHERE "{table_name}".geometry && b.g
+        AND ST_Intersects("{table_name}".geometry, b.g)
+    """)
 
-    # Now decode geometry_col robustly
-    if isinstance(geometry_col, (WKBElement, WKTElement)):
-        geom = mapping(to_shape(geometry_col))
-    elif isinstance(geometry_col, BaseGeometry):
-        geom = mapping(geometry_col)
-    elif isinstance(geometry_col, (bytes, str)):
-        # Raw WKB hex or bytes from DB
-        if isinstance(geometry_col, str):
-            # Assuming hex WKB representation if it's a string
-            try:
-                geom = mapping(wkb.loads(bytes.fromhex(geometry_col)))
-            except (ValueError, TypeError): # Handle non-hex strings or bad WKB
-                 raise ValueError(f"Cannot deserialize geometry from string: {geometry_col[:50]}...") # Show snippet
-        else:
-             # Assuming raw WKB bytes
-            try:
-                geom = mapping(wkb.loads(geometry_col))
-            except (ValueError, TypeError): # Handle bad WKB
-                 raise ValueError("Cannot deserialize geometry from bytes.")
+@functools.lru_cache(maxsize=256)
+def bbox_sql(table_name: str, columns: tuple, paged: bool = False):
+    """
+    The features in the :minx/:miny/:maxx/:maxy envelope, each rendered as a
+    GeoJSON Feature; with paged, only one :limit/:offset page of them, in id
+    order. Keyed by the column tuple too, so a table whose columns change
+    gets a fresh statement.
+    """
+    # Only non-null name/description are exposed as properties
+    property_columns = [col for col in ("name", "description") if col in columns]
+    if property_columns:
+        properties_sql = "json_strip_nulls(json_build_object(" + ", ".join(
+            f"'{col}', \"{col}\"" for col in property_columns
+        ) + "))"
     else:
-        # Fallback: try to convert with to_shape, else raise
+        properties_sql = "'{}'::json"
+    # Reason: unpaged requests skip the sort, which pagination only needs for stable pages
+    page_sql = 'ORDER BY "id" LIMIT :limit OFFSET :offset' if paged else ""
+    return text(f"""
+        SELECT json_build_object(
+            'type', 'Feature',
+            'id', "id",
+            'geometry', ST_AsGeoJSON("geometry")::json,
+            'properties', {properties_sql}
+        )::text
+        FROM public."{table_name}" -- Use quoted table name
+        WHERE geometry && ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326)
+        {page_sql}
+    """)
+
+@functools.lru_cache(maxsize=512)
+def compile_sql(sql, dialect):
+    """
+    Compile one of the cached statements above once per dialect.
+    """
+    return sql.compile(dialect=dialect)
+
+def stream_features(conn: Connection, sql, params: dict, prefix: str = "[", suffix="]",
+                    media_type: str = "application/json") -> StreamingResponse:
+    """
+    Execute a query returning one JSON text column per row and stream the rows
+    as a JSON array wrapped in prefix/suffix.
+    suffix may also be a callable taking the number of rows streamed, for
+    trailers that depend on it (e.g. pagination).
+    The statement runs on the connection's raw DBAPI connection, through a named
+    (server-side) cursor: rows come back as plain tuples, skipping SQLAlchemy's
+    Result/Row processing, and are fetched in batches of STREAM_BATCH_SIZE.
+    The first batch is fetched before returning, so query errors are still
+    raised inside the endpoint rather than midway through the response.
+    """
+    compiled = compile_sql(sql, conn.dialect)
+    cursor = conn.connection.cursor(name=f"spatial_stream_{uuid.uuid4().hex}")
+    # Rows per FETCH round trip, for both fetchmany() and plain iteration
+    cursor.arraysize = cursor.itersize = STREAM_BATCH_SIZE
+    try:
+        cursor.execute(compiled.string, compiled.construct_params(params))
+        first = cursor.fetchmany()
+    except Exception:
+        cursor.close()
+        raise
+
+    def generate():
         try:
-            geom = mapping(to_shape(geometry_col))
-        except Exception as e:
-            raise ValueError(f"Cannot serialize geometry: {e}")
+            yield prefix
+            batch = first
+            separator = ""
+            count = 0
+            while batch:
+                yield separator + ",".join(row[0] for row in batch)
+                separator = ","
+                count += len(batch)
+                batch = cursor.fetchmany()
+            yield suffix(count) if callable(suffix) else suffix
+        finally:
+            cursor.close()
+
+    return StreamingResponse(generate(), media_type=media_type)
+
+# Payloads larger than this (detailed multipolygons) are rarely repeated and
+# would only evict the small, frequently reused ones from the cache.
+GEOMETRY_CACHE_MAX_BYTES = 16384
 
-    geom = tuples_to_lists(geom)
+@functools.lru_cache(maxsize=4096)
+def _cached_geometry_wkb(payload: bytes) -> bytes:
+    return _parse_geometry_wkb(payload)
 
-    # Build properties dict, excluding None values
-    properties = {}
-    if name is not None:
-        properties['name'] = name
-    if description is not None:
-        properties['description'] = description
-    # Add any other non-null properties here if needed in the future
+def _parse_geometry_wkb(payload: bytes) -> bytes:
+    try:
+        geom = shapely.from_geojson(payload)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid geometry: {str(e)}")
+    if shapely.is_empty(geom):
+        raise HTTPException(status_code=422, detail="Invalid geometry: geometry is empty")
+    if not shapely.is_valid(geom):
+        raise HTTPException(status_code=422, detail=f"Invalid geometry: {shapely.is_valid_reason(geom)}")
+    return shapely.to_wkb(geom, output_dimension=2)
 
-    return {
-        "type": "Feature",
-        "id": id_,         # Use feature ID
-        "geometry": geom,
-        "properties": properties
-    }
+def geometry_wkb(geojson: dict) -> bytes:
+    """
+    Parse the request GeoJSON once with shapely (GEOS, in C) and return 2D WKB
+    to bind into the query, so PostGIS does not have to parse JSON.
+    Malformed GeoJSON, empty geometries and invalid geometries (e.g.
+    self-intersecting polygons) are rejected here with a 422 before touching
+    the database.
+    Small payloads are memoized, since clients tend to resend the same
+    geometries (viewport boxes, saved areas).
+    """
+    # Reason: sorted keys make equal geometries produce the same cache key
+    # regardless of how the client ordered the members.
+    payload = orjson.dumps(geojson, option=orjson.OPT_SORT_KEYS)
+    if len(payload) > GEOMETRY_CACHE_MAX_BYTES:
+        return _parse_geometry_wkb(payload)
+    return _cached_geometry_wkb(payload)
 
-router = APIRouter()
+def unwrap_geometry(body: dict) -> dict:
+    """
+    Accept either a GeoJSON dict or {"geometry": geojson} (for compatibility with some clients/tests).
+    """
+    if "geometry" in body and isinstance(body["geometry"], dict):
+        return body["geometry"]
+    return body
 
-def get_db():
-    db = SessionLocal()
+def run_spatial_query(conn: Connection, sql, params: dict, error_detail: str = "Invalid geometry") -> StreamingResponse:
+    """
+    Stream the features matched by a geometry query; failures are reported as 422.
+    Shared by the intersects/within/distance/buffer endpoints.
+    """
     try:
-        yield db
-    finally:
-        db.close()
+        return stream_features(conn, sql, params)
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"{error_detail}: {str(e)}")
 
-import json
+# Reason: the geometry queries return PostGIS-rendered JSON straight from the
+# cursor, so there is no response_model for FastAPI to validate against; the
+# SpatialOut array shape (which the frontend consumes) is documented only.
+FEATURE_LIST_RESPONSE = {200: {"model": List[SpatialOut], "description": "Matching features"}}
 
-@router.post("/features/{table_name}/query/intersects", response_model=List[SpatialOut])
+router = APIRouter(default_response_class=ORJSONResponse)
+
+@router.post("/features/{table_name}/query/intersects", responses=FEATURE_LIST_RESPONSE)
 def query_intersects(
     table_name: str,
     geometry: dict = Body(..., description="GeoJSON geometry for intersection query"),
-    db: Session = Depends(get_db)
+    conn: Connection = Depends(get_conn)
 ):
     """
     Return all features that intersect the given geometry from the specified table.
     Accepts either a GeoJSON dict or {"geometry": geojson} (for compatibility with some clients/tests).
     """
     table_name = validate_table_name(table_name)
-    if "geometry" in geometry and isinstance(geometry["geometry"], dict):
-        geojson = geometry["geometry"]
-    else:
-        geojson = geometry
-    geojson_str = json.dumps(geojson)
-    sql = text(f"""
-        SELECT 
-            "{table_name}".id as id,
-            "{table_name}".name as name,
-            "{table_name}".description as description,
-            "{table_name}".geometry as geometry
-        FROM {table_name}
-        WHERE ST_Intersects(
-            "{table_name}".geometry,
-            ST_SetSRID(ST_GeomFromGeoJSON(:geojson), 4326)
-        )
-    """)
-    try:
-        results = db.execute(sql, {"geojson": geojson_str}).fetchall()
-    except Exception as e:
-        raise HTTPException(status_code=422, detail=f"Invalid geometry: {str(e)}")
-    features = []
-    skipped = 0
-    for row in results:
-        try:
-            print("DEBUG: Raw DB row:", dict(row._mapping) if hasattr(row, '_mapping') else dict(row))
-            feature = serialize_spatial_row(row)
-            print("DEBUG: Serialized feature:", feature)
-            # Patch: Ensure required fields for SpatialOut
-            # geometry and id are required. Skip feature if missing.
-            if not feature.get('geometry') or not isinstance(feature['geometry'], dict):
-                raise ValueError('Feature geometry missing or invalid')
-            if feature.get('id') is None:
-                raise ValueError('Feature id missing')
-            # Defensive: ensure coordinates are lists, not tuples
-            def tuples_to_lists(obj):
-                if isinstance(obj, tuple):
-                    return [tuples_to_lists(i) for i in obj]
-                if isinstance(obj, list):
-                    return [tuples_to_lists(i) for i in obj]
-                if isinstance(obj, dict):
-                    return {k: tuples_to_lists(v) for k, v in obj.items()}
-                return obj
-            feature['geometry'] = tuples_to_lists(feature['geometry'])
-            features.append(feature)
-        except Exception as e:
-            skipped += 1
-            # Optionally log the error, e.g. print(f"Skipped feature due to error: {e}")
-            continue  # Skip invalid features
-    if skipped:
-        print(f"[Buffer Endpoint] Skipped {skipped} invalid features.")
-    return features
-
-import re
-
-def validate_table_name(table_name: str) -> str:
-    if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", table_name):
-        raise HTTPException(status_code=400, detail="Invalid table name")
-    return table_name
+    wkb = geometry_wkb(unwrap_geometry(geometry))
+    return run_spatial_query(conn, intersects_sql(table_name), {"wkb": wkb})
 
-@router.post("/features/{table_name}/query/within", response_model=List[SpatialOut])
+@router.post("/features/{table_name}/query/within", responses=FEATURE_LIST_RESPONSE)
 def query_within(
     table_name: str,
     geometry: dict = Body(..., description="GeoJSON geometry for within query"),
-    db: Session = Depends(get_db)
+    conn: Connection = Depends(get_conn)
 ):
     """
     Return all features within the given geometry from the specified table.
     Accepts either a GeoJSON dict or {"geometry": geojson} (for compatibility with some clients/tests).
     """
     table_name = validate_table_name(table_name)
-    if "geometry" in geometry and isinstance(geometry["geometry"], dict):
-        geojson = geometry["geometry"]
-    else:
-        geojson = geometry
-    geojson_str = json.dumps(geojson)
+    wkb = geometry_wkb(unwrap_geometry(geometry))
     # For Points, we want to check if they intersect or are equal, not if one is within the other
     # ST_Within(A,B) returns true if A is completely within B, which for Points means they must be identical
-    sql = text(f"""
-        SELECT 
-            "{table_name}".id as id,
-            "{table_name}".name as name,
-            "{table_name}".description as description,
-            "{table_name}".geometry as geometry
-        FROM {table_name}
-        WHERE ST_Intersects(
-            "{table_name}".geometry,
-            ST_SetSRID(ST_GeomFromGeoJSON(:geojson), 4326)
-        )
+    return run_spatial_query(conn, intersects_sql(table_name), {"wkb": wkb})
+
+@functools.lru_cache(maxsize=256)
+def table_columns(table_name: str, schema: str = "public") -> tuple:
+    """
+    Column names of a table, in ordinal order.
+    Cached per process so the catalog is queried once per table; a missing
+    table raises (and is therefore not cached). Call table_columns.cache_clear()
+    after DDL that creates, replaces or drops tables.
+    """
+    column_query = text("""
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = :schema AND table_name = :table_name
+        ORDER BY ordinal_position;
     """)
-    try:
-        results = db.execute(sql, {"geojson": geojson_str}).fetchall()
-    except Exception as e:
-        raise HTTPException(status_code=422, detail=f"Invalid geometry: {str(e)}")
-    features = []
-    skipped = 0
-    for row in results:
-        try:
-            print("DEBUG: Raw DB row:", dict(row._mapping) if hasattr(row, '_mapping') else dict(row))
-            feature = serialize_spatial_row(row)
-            print("DEBUG: Serialized feature:", feature)
-            # Patch: Ensure required fields for SpatialOut
-            # geometry and id are required. Skip feature if missing.
-            if not feature.get('geometry') or not isinstance(feature['geometry'], dict):
-                raise ValueError('Feature geometry missing or invalid')
-            if feature.get('id') is None:
-                raise ValueError('Feature id missing')
-            # Defensive: ensure coordinates are lists, not tuples
-            def tuples_to_lists(obj):
-                if isinstance(obj, tuple):
-                    return [tuples_to_lists(i) for i in obj]
-                if isinstance(obj, list):
-                    return [tuples_to_lists(i) for i in obj]
-                if isinstance(obj, dict):
-                    return {k: tuples_to_lists(v) for k, v in obj.items()}
-                return obj
-            feature['geometry'] = tuples_to_lists(feature['geometry'])
-            features.append(feature)
-        except Exception as e:
-            skipped += 1
-            # Optionally log the error, e.g. print(f"Skipped feature due to error: {e}")
-            continue  # Skip invalid features
-    if skipped:
-        print(f"[Buffer Endpoint] Skipped {skipped} invalid features.")
-    return features
+    with SessionLocal() as db:
+        columns = tuple(row[0] for row in db.execute(column_query, {"schema": schema, "table_name": table_name}))
+    if not columns:
+        raise HTTPException(status_code=404, detail=f"Table '{table_name}' not found or has no columns.")
+    return columns
 
 @router.post("/features/{table_name}/query/bbox")
 def query_bbox(
     table_name: str,
-    body: dict = Body(..., description="Bounding box as {\"bbox\": [minx, miny, maxx, maxy]}"),
-    db: Session = Depends(get_db)
+    body: dict = Body(..., description="Bounding box as {\"bbox\": [minx, miny, maxx, maxy]}, with optional \"limit\" and \"offset\""),
+    conn: Connection = Depends(get_conn)
 ):
     """
     Return all features within the bounding box from the specified table.
     Accepts either {\"bbox\": [...]} or direct dict with bbox key.
-    Returns features as a GeoJSON FeatureCollection.
+    Returns features as a GeoJSON FeatureCollection. Without "limit" every
+    feature in the bbox is returned; with it, one page at a time: at most
+    "limit" features (capped at BBOX_MAX_LIMIT) starting at "offset".
+    "next_offset" is the offset of the next page, or null on the last one.
     """
     safe_table_name = validate_table_name(table_name)
     bbox = body.get("bbox")
@@ -263,170 +302,69 @@ def query_bbox(
         raise HTTPException(status_code=422, detail="bbox must be a list of four numbers [minx, miny, maxx, maxy]")
 
     minx, miny, maxx, maxy = bbox
+    limit = body.get("limit")
+    offset = body.get("offset", 0)
+    if (limit is not None and (not isinstance(limit, int) or limit < 1)) or not isinstance(offset, int) or offset < 0:
+        raise HTTPException(status_code=422, detail="limit must be a positive integer and offset a non-negative integer")
+    if limit is not None:
+        limit = min(limit, BBOX_MAX_LIMIT)
 
-    # Fetch column names for the table
-    try:
-        column_query = text("""
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_schema = 'public' AND table_name = :table_name
-            ORDER BY ordinal_position;
-        """)
-        column_result = db.execute(column_query, {"table_name": safe_table_name})
-        columns = [row[0] for row in column_result]
+    def page_suffix(count: int) -> str:
+        next_offset = offset + count if limit is not None and count == limit else None
+        return ']' + ',"next_offset":' + orjson.dumps(next_offset).decode() + '}'
 
-        if not columns:
-            raise HTTPException(status_code=404, detail=f"Table '{safe_table_name}' not found or has no columns.")
+    # Fetch column names for the table (cached per table name)
+    try:
+        columns = table_columns(safe_table_name)
         if 'id' not in columns:
              raise HTTPException(status_code=500, detail=f"Table '{safe_table_name}' is missing the required 'id' column.")
         if 'geometry' not in columns:
              raise HTTPException(status_code=500, detail=f"Table '{safe_table_name}' is missing the required 'geometry' column.")
-
+    except HTTPException:
+        raise
     except Exception as e:
         # Log the error e
         raise HTTPException(status_code=500, detail=f"Error fetching columns for table '{safe_table_name}': {e}")
 
-    # Construct the SELECT statement with explicit, quoted column names
-    select_columns = ", ".join([f'"{col}"' for col in columns]) # Quote identifiers
-
-    # Construct the spatial query
-    sql = text(f"""
-        SELECT {select_columns}
-        FROM public."{safe_table_name}" -- Use quoted table name
-        WHERE geometry && ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326)
-    """)
-
     try:
-        results = db.execute(sql, {"minx": minx, "miny": miny, "maxx": maxx, "maxy": maxy}).fetchall()
-        features = [serialize_spatial_row(row) for row in results]
-        # Return as GeoJSON FeatureCollection
-        return {
-            "type": "FeatureCollection",
-            "features": features
-        }
+        # Stream as a GeoJSON FeatureCollection; PostGIS renders each Feature
+        paged = limit is not None or offset > 0
+        params = {"minx": minx, "miny": miny, "maxx": maxx, "maxy": maxy}
+        if paged:
+            params.update(limit=limit, offset=offset)
+        return stream_features(
+            conn, bbox_sql(safe_table_name, columns, paged), params,
+            prefix='{"type":"FeatureCollection","features":[', suffix=page_suffix,
+            media_type="application/geo+json",
+        )
     except Exception as e:
         # Log the error e
         raise HTTPException(status_code=500, detail=f"Error querying features: {e}")
 
-@router.post("/features/{table_name}/query/distance", response_model=List[SpatialOut])
+@router.post("/features/{table_name}/query/distance", responses=FEATURE_LIST_RESPONSE)
 def query_distance(
     table_name: str,
     geometry: dict = Body(..., description="GeoJSON geometry for distance query"),
     distance: float = Body(..., description="Distance in meters"),
-    db: Session = Depends(get_db)
+    conn: Connection = Depends(get_conn)
 ):
     """
     Return all features within a given distance (meters) of the geometry from the specified table.
     """
     table_name = validate_table_name(table_name)
-    geojson_str = json.dumps(geometry)
-    sql = text(f"""
-        SELECT 
-            "{table_name}".id as id,
-            "{table_name}".name as name,
-            "{table_name}".description as description,
-            "{table_name}".geometry as geometry
-        FROM {table_name}
-        WHERE ST_DWithin(
-            "{table_name}".geometry::geography,
-            ST_SetSRID(ST_GeomFromGeoJSON(:geojson), 4326)::geography,
-            :distance
-        )
-    """)
-    results = db.execute(sql, {"geojson": geojson_str, "distance": distance}).fetchall()
-    features = []
-    skipped = 0
-    for row in results:
-        try:
-            print("DEBUG: Raw DB row:", dict(row._mapping) if hasattr(row, '_mapping') else dict(row))
-            feature = serialize_spatial_row(row)
-            print("DEBUG: Serialized feature:", feature)
-            # Patch: Ensure required fields for SpatialOut
-            # geometry and id are required. Skip feature if missing.
-            if not feature.get('geometry') or not isinstance(feature['geometry'], dict):
-                raise ValueError('Feature geometry missing or invalid')
-            if feature.get('id') is None:
-                raise ValueError('Feature id missing')
-            # Defensive: ensure coordinates are lists, not tuples
-            def tuples_to_lists(obj):
-                if isinstance(obj, tuple):
-                    return [tuples_to_lists(i) for i in obj]
-                if isinstance(obj, list):
-                    return [tuples_to_lists(i) for i in obj]
-                if isinstance(obj, dict):
-                    return {k: tuples_to_lists(v) for k, v in obj.items()}
-                return obj
-            feature['geometry'] = tuples_to_lists(feature['geometry'])
-            features.append(feature)
-        except Exception as e:
-            skipped += 1
-            # Optionally log the error, e.g. print(f"Skipped feature due to error: {e}")
-            continue  # Skip invalid features
-    if skipped:
-        print(f"[Buffer Endpoint] Skipped {skipped} invalid features.")
-    return features
+    wkb = geometry_wkb(geometry)
+    return run_spatial_query(conn, distance_sql(table_name), {"wkb": wkb, "distance": distance}, "Invalid geometry or distance")
 
-import json
-
-@router.post("/features/{table_name}/query/buffer", response_model=List[SpatialOut])
+@router.post("/features/{table_name}/query/buffer", responses=FEATURE_LIST_RESPONSE)
 def query_buffer(
     table_name: str,
     geometry: dict = Body(..., description="GeoJSON geometry for buffer query"),
     buffer: float = Body(..., description="Buffer distance in meters"),
-    db: Session = Depends(get_db)
+    conn: Connection = Depends(get_conn)
 ):
     """
     Return all features that intersect the buffer around the given geometry from the specified table.
     """
     table_name = validate_table_name(table_name)
-    geojson_str = json.dumps(geometry)
-    sql = text(f"""
-        SELECT 
-            "{table_name}".id as id,
-            "{table_name}".name as name,
-            "{table_name}".description as description,
-            "{table_name}".geometry as geometry
-        FROM {table_name}
-        WHERE ST_Intersects(
-            "{table_name}".geometry,
-            ST_Buffer(
-                ST_SetSRID(ST_GeomFromGeoJSON(:geojson), 4326)::geography,
-                :buffer
-            )::geometry
-        )
-    """)
-    try:
-        results = db.execute(sql, {"geojson": geojson_str, "buffer": buffer}).fetchall()
-    except Exception as e:
-        raise HTTPException(status_code=422, detail=f"Invalid geometry or buffer: {str(e)}")
-    features = []
-    skipped = 0
-    for row in results:
-        try:
-            print("DEBUG: Raw DB row:", dict(row._mapping) if hasattr(row, '_mapping') else dict(row))
-            feature = serialize_spatial_row(row)
-            print("DEBUG: Serialized feature:", feature)
-            # Patch: Ensure required fields for SpatialOut
-            # geometry and id are required. Skip feature if missing.
-            if not feature.get('geometry') or not isinstance(feature['geometry'], dict):
-                raise ValueError('Feature geometry missing or invalid')
-            if feature.get('id') is None:
-                raise ValueError('Feature id missing')
-            # Defensive: ensure coordinates are lists, not tuples
-            def tuples_to_lists(obj):
-                if isinstance(obj, tuple):
-                    return [tuples_to_lists(i) for i in obj]
-                if isinstance(obj, list):
-                    return [tuples_to_lists(i) for i in obj]
-                if isinstance(obj, dict):
-                    return {k: tuples_to_lists(v) for k, v in obj.items()}
-                return obj
-            feature['geometry'] = tuples_to_lists(feature['geometry'])
-            features.append(feature)
-        except Exception as e:
-            skipped += 1
-            # Optionally log the error, e.g. print(f"Skipped feature due to error: {e}")
-            continue  # Skip invalid features
-    if skipped:
-        print(f"[Buffer Endpoint] Skipped {skipped} invalid features.")
-    return features
+    wkb = geometry_wkb(geometry)
+    return run_spatial_query(conn, buffer_sql(table_name), {"wkb": wkb, "buffer": buffer}, "Invalid geometry or buffer")
@@ -6,6 +6,9 @@ from pydantic import BaseModel, Field
 from typing import Literal, List, Optional
 from sqlalchemy import text
 from app.db.session import engine
+from app.api.spatial import spatial_tables
+from app.crud.spatial import crud_spatial, version_forget_statement, version_tracking_statements
+from app.api.spatial_query import table_columns
 
 router = APIRouter()
 
@@ -22,10 +25,9 @@ class SpatialTableCreateRequest(BaseModel):
     srid: int = 4326
     fields: Optional[List[FieldDefinition]] = Field(default_factory=list, description="Additional user-defined fields")
 
-@router.post("/spatial-tables/", status_code=status.HTTP_201_CREATED)
-def create_spatial_table(req: SpatialTableCreateRequest = Body(...)):
+def create_table_statements(req: SpatialTableCreateRequest) -> List[str]:
     """
-    Create a new spatial table with the specified geometry type, SRID, and user-defined fields.
+    DDL for one spatial table: CREATE TABLE plus its spatial indexes.
     """
     table_name = req.table_name.lower()
     geometry_type = req.geometry_type.upper()
@@ -41,14 +43,53 @@ def create_spatial_table(req: SpatialTableCreateRequest = Body(...)):
         *field_sql,
         f"geometry geometry({geometry_type}, {srid}) NOT NULL"
     ]
-    sql = f"CREATE TABLE IF NOT EXISTS {table_name} (" + ", ".join(columns) + ")"
+    # Reason: without spatial indexes every query endpoint scans the whole table;
+    # the geography expression index serves the ST_DWithin(geometry::geography, ...) distance query.
+    # It only exists for geographic (long/lat) SRIDs: for projected ones such as
+    # 3857 the cast fails, and the index would then reject every INSERT.
+    geography_index = (
+        f'CREATE INDEX IF NOT EXISTS "{table_name}_geog_gix" ON {table_name} USING GIST ((geometry::geography))'
+    )
+    return [
+        f"CREATE TABLE IF NOT EXISTS {table_name} (" + ", ".join(columns) + ")",
+        f'CREATE INDEX IF NOT EXISTS "{table_name}_geom_gix" ON {table_name} USING GIST (geometry)',
+        f"""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM spatial_ref_sys WHERE srid = {srid} AND proj4text LIKE '%+proj=longlat%') THEN
+                EXECUTE '{geography_index}';
+            END IF;
+        END
+        $$
+        """,
+        # Write counter behind the list endpoint's ETags
+        *version_tracking_statements(table_name),
+    ]
+
+def execute_table_ddl(statements: List[str], table_names: List[str]):
+    """
+    Run DDL statements in one transaction, then drop cached table metadata.
+    """
     try:
         with engine.connect() as connection:
-            connection.execute(text(sql))
+            for statement in statements:
+                connection.execute(text(statement))
             connection.commit()
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error creating table: {str(e)}")
-    return {"message": f"Table '{table_name}' created with geometry type '{geometry_type}' and SRID {srid}."}
+    table_columns.cache_clear()
+    spatial_tables.cache_clear()
+    for table_name in table_names:
+        crud_spatial.invalidate(table_name)
+
+@router.post("/spatial-tables/", status_code=status.HTTP_201_CREATED)
+def create_spatial_table(req: SpatialTableCreateRequest = Body(...)):
+    """
+    Create a new spatial table with the specified geometry type, SRID, and user-defined fields.
+    """
+    table_name = req.table_name.lower()
+    execute_table_ddl(create_table_statements(req), [table_name])
+    return {"message": f"Table '{table_name}' created with geometry type '{req.geometry_type.upper()}' and SRID {req.srid}."}
 
 @router.get("/spatial-tables/", status_code=200)
 def list_spatial_tables():
@@ -86,11 +127,18 @@ def delete_spatial_table(table_name: str):
     """
     Drop a spatial table.
     """
+    # Same ASCII identifier rule as table creation; the name is interpolated into SQL
+    if not (table_name.isascii() and table_name.isidentifier()):
+        raise HTTPException(status_code=400, detail="Invalid table name")
     sql = text(f"DROP TABLE IF EXISTS {table_name} CASCADE")
     try:
         with engine.connect() as connection:
+            connection.execute(text(version_forget_statement(table_name.lower())))
             connection.execute(sql)
             connection.commit()
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error deleting table: {str(e)}")
+    table_columns.cache_clear()
+    spatial_tables.cache_clear()
+    crud_spatial.invalidate(table_name)
     return {"message": f"Table '{table_name}' deleted."}
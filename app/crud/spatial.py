@@ -2,38 +2,256 @@
 CRUD operations for spatial features and GeoPackage import.
 """
 from sqlalchemy.orm import Session
-from app.models.spatial import SpatialFeature
 from app.schemas.spatial import SpatialCreate, SpatialUpdate
-from geoalchemy2.shape import to_shape, from_shape
-from shapely.geometry import shape, mapping
-from typing import List, Optional
-import re
+from typing import List, Optional, Tuple
 from sqlalchemy import Table, MetaData, text
 from fastapi import HTTPException
-from shapely.errors import GeometryTypeError, GEOSException
-import fiona
 import sqlalchemy
-from shapely import geometry as sgeom
-from geoalchemy2 import WKBElement
-import os
+import io
+import logging
+import orjson
+import threading
+
+logger = logging.getLogger("crud.spatial")
+
+# Rows per COPY during GeoPackage import; bounds the size of the CSV buffer
+COPY_BATCH_SIZE = 50000
+
+# Reflected tables keyed by (database URL, table name), see CRUDSpatial._get_table
+_TABLE_CACHE = {}
+# Parameterized statements keyed by (reflected table, operation, variant), see CRUDSpatial._statement
+_STMT_CACHE = {}
+_TABLE_CACHE_LOCK = threading.Lock()
+# Database URLs already seen to have public.table_versions, see CRUDSpatial.get_version
+_VERSIONED_DATABASES = set()
+
+def version_tracking_statements(table_name: str) -> List[str]:
+    """
+    DDL that makes a table's writes bump its counter in public.table_versions,
+    which CRUDSpatial.get_version() reads for ETags.
+
+    A statement-level trigger increments the counter once per INSERT, UPDATE,
+    DELETE, TRUNCATE or COPY, so reading the version is a primary-key lookup
+    instead of an aggregate over the table. Counters are keyed by the table's
+    OID, so a dropped and recreated table never reuses an old one. The shared
+    table and trigger function are created on first use; run the statements
+    in one transaction, since the advisory lock serializes that.
+    """
+    return [
+        "SELECT pg_advisory_xact_lock(hashtext('public.table_versions'))",
+        "CREATE TABLE IF NOT EXISTS public.table_versions (table_oid oid PRIMARY KEY, version bigint NOT NULL)",
+        """
+        CREATE OR REPLACE FUNCTION public.bump_table_version() RETURNS trigger LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO public.table_versions (table_oid, version) VALUES (TG_RELID, 1)
+            ON CONFLICT (table_oid) DO UPDATE SET version = public.table_versions.version + 1;
+            RETURN NULL;
+        END
+        $$
+        """,
+        f'DROP TRIGGER IF EXISTS "{table_name}_version" ON "{table_name}"',
+        f'CREATE TRIGGER "{table_name}_version" AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON "{table_name}" '
+        "FOR EACH STATEMENT EXECUTE FUNCTION public.bump_table_version()",
+        f"""
+        INSERT INTO public.table_versions (table_oid, version) VALUES ('"{table_name}"'::regclass, 1)
+        ON CONFLICT (table_oid) DO UPDATE SET version = public.table_versions.version + 1
+        """,
+    ]
+
+def version_forget_statement(table_name: str) -> str:
+    """
+    SQL deleting a table's counter from public.table_versions (if that exists);
+    run it before dropping the table, so a later table reusing the OID starts
+    from a fresh counter rather than colliding with old ETags.
+    """
+    return f"""
+        DO $$
+        BEGIN
+            IF to_regclass('public.table_versions') IS NOT NULL AND to_regclass('"{table_name}"') IS NOT NULL THEN
+                DELETE FROM public.table_versions WHERE table_oid = to_regclass('"{table_name}"');
+            END IF;
+        END
+        $$
+    """
+
+def _pg_column_type(arrow_type) -> str:
+    """
+    Map an Arrow field type to the PostgreSQL column type used for imported attributes.
+    """
+    import pyarrow as pa
+    if pa.types.is_boolean(arrow_type):
+        return "BOOLEAN"
+    if pa.types.is_integer(arrow_type):
+        return "BIGINT"
+    if pa.types.is_floating(arrow_type):
+        return "DOUBLE PRECISION"
+    if pa.types.is_timestamp(arrow_type):
+        return "TIMESTAMPTZ" if arrow_type.tz else "TIMESTAMP"
+    if pa.types.is_date(arrow_type):
+        return "DATE"
+    if pa.types.is_time(arrow_type):
+        return "TIME"
+    if pa.types.is_binary(arrow_type) or pa.types.is_large_binary(arrow_type):
+        return "BYTEA"
+    return "TEXT"
+
+def _srid_from_crs(crs: Optional[str]) -> int:
+    """
+    EPSG code of a CRS string as reported by pyogrio, or 0 if it has none.
+    """
+    if not crs:
+        return 0
+    from pyproj import CRS
+    return CRS.from_user_input(crs).to_epsg() or 0
+
+def _pg_geometry_type(ogr_geometry_type: Optional[str]) -> str:
+    """
+    PostGIS typmod for an OGR layer geometry type, e.g. 'Point Z' -> 'POINTZ'.
+    Layers that declare no single type get the generic GEOMETRY.
+    """
+    if not ogr_geometry_type or ogr_geometry_type.startswith("Unknown"):
+        return "GEOMETRY"
+    return ogr_geometry_type.upper().replace(" ", "")
+
+def _csv_compatible(column):
+    """
+    Arrow's CSV writer cannot write binary columns; send them as bytea hex text.
+    """
+    import pyarrow as pa
+    if pa.types.is_binary(column.type) or pa.types.is_large_binary(column.type):
+        return pa.array([None if value is None else "\\x" + value.hex() for value in column.to_pylist()], pa.string())
+    return column
+
+def _quote_ident(name: str) -> str:
+    """
+    Quote an identifier taken from file data (GeoPackage field names may contain ':' etc.).
+    """
+    return '"' + str(name).replace('"', '""') + '"'
+
+# Bind parameter names used by the cached statements; prefixed so they can
+# never be mistaken for a column of a reflected table
+ID_PARAM = "_crud_id"
+GEOJSON_PARAM = "_crud_geojson"
+
+GEOJSON_GEOMETRY_TYPES = frozenset({
+    "Point", "LineString", "Polygon", "MultiPoint", "MultiLineString", "MultiPolygon", "GeometryCollection",
+})
+
+def _geojson_param(geometry) -> str:
+    """
+    Encode a validated GeoJSON geometry for the GEOJSON_PARAM bind parameter.
+
+    The GeoJSON is sent as-is and parsed server-side by ST_GeomFromGeoJSON, so
+    no shapely geometry is built or WKB-encoded in Python for each write.
+    """
+    if geometry.type not in GEOJSON_GEOMETRY_TYPES:
+        raise HTTPException(status_code=422, detail=f"Invalid geometry: unknown geometry type '{geometry.type}'")
+    return orjson.dumps(geometry.model_dump()).decode()
+
+def _geometry_from_geojson():
+    return sqlalchemy.func.ST_SetSRID(sqlalchemy.func.ST_GeomFromGeoJSON(sqlalchemy.bindparam(GEOJSON_PARAM)), 4326)
+
+def _raise_if_invalid_geometry(geometry):
+    """
+    After a failed write, report a geometry PostGIS could not parse as a 422
+    (checked with shapely only on this error path) rather than a generic 500.
+    """
+    from shapely.geometry import shape
+
+    try:
+        shape(geometry.model_dump())
+    except Exception as e:
+        raise HTTPException(status_code=422, detail=f"Invalid geometry: {e}")
 
 class CRUDSpatial:
     """
     CRUD utility for spatial features, supporting dynamic table names via reflection or raw SQL.
     """
     def _validate_table_name(self, table_name: str) -> str:
-        if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", table_name):
+        # ASCII identifier, same as ^[a-zA-Z_][a-zA-Z0-9_]*$, checked in C without the regex engine
+        if not (table_name.isascii() and table_name.isidentifier()):
             raise HTTPException(status_code=400, detail="Invalid table name")
         return table_name
 
     def _get_table(self, db: Session, table_name: str):
-        metadata = MetaData()
-        try:
-            table = Table(table_name, metadata, autoload_with=db.get_bind())
-        except Exception:
-            raise HTTPException(status_code=404, detail=f"Table '{table_name}' does not exist.")
+        # Reason: reflection costs several catalog queries, so reflected tables are
+        # cached per process; invalidate() must be called after DDL on a table
+        bind = db.get_bind()
+        # bind is an Engine, or a Connection when the session joins an outer transaction
+        key = (str(bind.engine.url), table_name)
+        table = _TABLE_CACHE.get(key)
+        if table is not None:
+            return table
+        with _TABLE_CACHE_LOCK:
+            table = _TABLE_CACHE.get(key)
+            if table is None:
+                try:
+                    table = Table(table_name, MetaData(), autoload_with=bind)
+                except Exception:
+                    raise HTTPException(status_code=404, detail=f"Table '{table_name}' does not exist.")
+                _TABLE_CACHE[key] = table
         return table
 
+    def _statement(self, table: Table, operation: str, variant: tuple = ()):
+        """
+        Parameterized statement for one CRUD operation on a reflected table.
+
+        Statements are built once per table and reused, so each call only binds
+        values (ID_PARAM, GEOJSON_PARAM, skip/limit, plain column values).
+        variant lists the columns set from SQL expressions in an UPDATE.
+        """
+        key = (table, operation, variant)
+        stmt = _STMT_CACHE.get(key)
+        if stmt is not None:
+            return stmt
+        by_id = table.c.id == sqlalchemy.bindparam(ID_PARAM)
+        if operation == "insert":
+            stmt = table.insert().values(geometry=_geometry_from_geojson()).returning(table)
+        elif operation == "insert_many":
+            # Reason: sorted RETURNING lets SQLAlchemy batch the executemany into
+            # multi-row INSERT ... VALUES statements while keeping input order.
+            stmt = (
+                sqlalchemy.insert(table)
+                .values(geometry=_geometry_from_geojson())
+                .returning(table, sort_by_parameter_order=True)
+            )
+        elif operation == "get":
+            stmt = table.select().where(by_id)
+        elif operation == "get_multi":
+            stmt = table.select().offset(sqlalchemy.bindparam("skip")).limit(sqlalchemy.bindparam("limit"))
+        elif operation == "update":
+            expressions = {"geometry": _geometry_from_geojson(), "updated_at": sqlalchemy.func.now()}
+            stmt = (
+                table.update()
+                .where(by_id)
+                .values(**{column: expressions[column] for column in variant})
+                .returning(table)
+            )
+        elif operation == "remove":
+            stmt = table.delete().where(by_id).returning(table)
+        else:
+            raise ValueError(f"Unknown operation: {operation}")
+        # Reason: invalidate() iterates the cache under the lock, so inserts take it too
+        with _TABLE_CACHE_LOCK:
+            return _STMT_CACHE.setdefault(key, stmt)
+
+    def invalidate(self, table_name: Optional[str] = None):
+        """
+        Drop cached reflected tables, and their statements, after DDL.
+
+        Args:
+            table_name (Optional[str]): Table to forget, or None to clear the whole cache.
+        """
+        with _TABLE_CACHE_LOCK:
+            if table_name is None:
+                _TABLE_CACHE.clear()
+                _STMT_CACHE.clear()
+            else:
+                for key in [key for key in _TABLE_CACHE if key[1] == table_name]:
+                    del _TABLE_CACHE[key]
+                for key in [key for key in _STMT_CACHE if key[0].name == table_name]:
+                    del _STMT_CACHE[key]
+
     def create(self, db: Session, feature: 'SpatialCreate', table_name: str):
         """
         Insert a new spatial feature into the specified table.
@@ -48,27 +266,54 @@ class CRUDSpatial:
         """
         self._validate_table_name(table_name)
         table = self._get_table(db, table_name)
-        # Prepare geometry
-        try:
-            geom_shape = shape(feature.geometry.model_dump())
-            geom_wkb = from_shape(geom_shape, srid=4326)
-        except Exception as e:
-            raise HTTPException(status_code=422, detail=f"Invalid geometry: {e}")
-        # Prepare insert dict
-        insert_dict = {
-            'geometry': geom_wkb
+        # Prepare insert parameters
+        params = {
+            GEOJSON_PARAM: _geojson_param(feature.geometry)
         }
         if feature.name is not None:
-            insert_dict['name'] = feature.name
+            params['name'] = feature.name
         if feature.description is not None:
-            insert_dict['description'] = feature.description
+            params['description'] = feature.description
         try:
-            insert_stmt = table.insert().values(**insert_dict).returning(table)
-            result = db.execute(insert_stmt)
+            result = db.execute(self._statement(table, "insert"), params)
             db.commit()
             return result.fetchone()
         except Exception as e:
             db.rollback()
+            _raise_if_invalid_geometry(feature.geometry)
+            raise HTTPException(status_code=500, detail=f"Database insert failed: {e}")
+
+    def create_many(self, db: Session, features: List['SpatialCreate'], table_name: str):
+        """
+        Insert several spatial features into the specified table in one transaction.
+
+        Args:
+            db (Session): Database session.
+            features (List[SpatialCreate]): Features to insert.
+            table_name (str): Table name.
+
+        Returns:
+            List[Any]: Inserted rows, in the order of features.
+        """
+        self._validate_table_name(table_name)
+        if not features:
+            return []
+        table = self._get_table(db, table_name)
+        # Every row binds the same keys, as executemany requires
+        columns = [column for column in ('name', 'description') if column in table.c]
+        params = [
+            {GEOJSON_PARAM: _geojson_param(feature.geometry), **{column: getattr(feature, column) for column in columns}}
+            for feature in features
+        ]
+        try:
+            result = db.execute(self._statement(table, "insert_many"), params)
+            rows = result.fetchall()
+            db.commit()
+            return rows
+        except Exception as e:
+            db.rollback()
+            for feature in features:
+                _raise_if_invalid_geometry(feature.geometry)
             raise HTTPException(status_code=500, detail=f"Database insert failed: {e}")
 
     def get(self, db: Session, feature_id: int, table_name: str):
@@ -86,8 +331,7 @@ class CRUDSpatial:
         self._validate_table_name(table_name)
         table = self._get_table(db, table_name)
         try:
-            stmt = table.select().where(table.c.id == feature_id)
-            result = db.execute(stmt)
+            result = db.execute(self._statement(table, "get"), {ID_PARAM: feature_id})
             return result.fetchone()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Database select failed: {e}")
@@ -108,67 +352,99 @@ class CRUDSpatial:
         self._validate_table_name(table_name)
         table = self._get_table(db, table_name)
         try:
-            stmt = table.select().offset(skip).limit(limit)
-            result = db.execute(stmt)
+            result = db.execute(self._statement(table, "get_multi"), {"skip": skip, "limit": limit})
             return result.fetchall()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Database select failed: {e}")
 
+    def get_version(self, db: Session, table_name: str) -> Optional[str]:
+        """
+        Version of a table's contents, for HTTP ETags.
+
+        Read from the counter that version_tracking_statements() has the table's
+        trigger maintain: one primary-key lookup, however large the table.
+        Tables created before tracking existed (or outside this API) have no
+        counter and return None, as does every table while public.table_versions
+        does not exist.
+
+        Args:
+            db (Session): Database session.
+            table_name (str): Table name.
+
+        Returns:
+            Optional[str]: "<table oid>.<counter>", or None if the table is not tracked.
+        """
+        self._validate_table_name(table_name)
+        # Reason: without the migration (or any tracked table yet) the counter
+        # table does not exist; querying it would fail and abort the session's
+        # transaction, so check once per database until it shows up.
+        url = str(db.get_bind().engine.url)
+        if url not in _VERSIONED_DATABASES:
+            if db.execute(text("SELECT to_regclass('public.table_versions')")).scalar() is None:
+                return None
+            _VERSIONED_DATABASES.add(url)
+        stmt = text("""
+            SELECT table_oid::text || '.' || version
+            FROM public.table_versions
+            WHERE table_oid = to_regclass(:table_name)
+        """)
+        try:
+            return db.execute(stmt, {"table_name": f'"{table_name}"'}).scalar()
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Database select failed: {e}")
+
     def update(self, db: Session, db_obj: any, feature: 'SpatialUpdate', table_name: str):
         """
         Update a spatial feature in the specified table.
 
         Args:
             db (Session): Database session.
-            db_obj (Any): Existing row/ORM object.
+            db_obj (Any): Existing row/ORM object, or any mapping with its 'id'.
             feature (SpatialUpdate): Data to update.
             table_name (str): Table name.
 
         Returns:
-            Any: Updated row or ORM object.
+            Any: Updated row or ORM object, or None if no row has that id.
         """
-        import logging
-        logger = logging.getLogger("crud.spatial.update")
         self._validate_table_name(table_name)
         table = self._get_table(db, table_name)
         # If db_obj is a SQLAlchemy Row, convert to dict-like for key access
         if hasattr(db_obj, "_mapping"):
             db_obj = db_obj._mapping
-        logger.info(f"Updating feature in table: {table_name}, feature_id: {db_obj['id']}")
-        logger.debug(f"Incoming update data: {feature}")
+        logger.info("Updating feature in table: %s, feature_id: %s", table_name, db_obj['id'])
+        logger.debug("Incoming update data: %s", feature)
         update_dict = {}
+        expression_columns = []
         if feature.name is not None:
             update_dict['name'] = feature.name
         if feature.description is not None:
             update_dict['description'] = feature.description
         if feature.geometry is not None:
-            try:
-                logger.debug(f"Raw geometry for update: {feature.geometry}")
-                geom_shape = shape(feature.geometry.model_dump())
-                geom_wkb = from_shape(geom_shape, srid=4326)
-                update_dict['geometry'] = geom_wkb
-            except Exception as e:
-                logger.error(f"Invalid geometry in update: {e}")
-                raise HTTPException(status_code=422, detail=f"Invalid geometry: {e}")
-        logger.info(f"Update dict to apply: {update_dict}")
+            logger.debug("Raw geometry for update: %s", feature.geometry)
+            update_dict[GEOJSON_PARAM] = _geojson_param(feature.geometry)
+            expression_columns.append('geometry')
+        logger.debug("Update dict to apply: %s", update_dict)
         if not update_dict:
             logger.warning("Update called with no fields to update.")
             raise HTTPException(status_code=400, detail="No fields to update.")
+        # Reason: the reflected table does not carry the model's onupdate
+        if "updated_at" in table.c:
+            expression_columns.append('updated_at')
+        update_dict[ID_PARAM] = db_obj['id']
         try:
-            stmt = (
-                table.update()
-                .where(table.c.id == db_obj['id'])
-                .values(**update_dict)
-                .returning(table)
-            )
-            logger.debug(f"Executing update statement: {stmt}")
-            result = db.execute(stmt)
+            stmt = self._statement(table, "update", tuple(expression_columns))
+            # Compiling the statement to a string is only worth it when debugging
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Executing update statement: %s", stmt)
+            result = db.execute(stmt, update_dict)
             db.commit()
             logger.info("Update successful.")
             return result.fetchone()
         except Exception as e:
-            logger.error(f"Exception during update: {e}", exc_info=True)
+            logger.error("Exception during update: %s", e, exc_info=True)
             db.rollback()
+            if feature.geometry is not None:
+                _raise_if_invalid_geometry(feature.geometry)
             raise HTTPException(status_code=500, detail=f"Database update failed: {e}")
 
     def remove(self, db: Session, feature_id: int, table_name: str):
@@ -186,8 +462,7 @@ class CRUDSpatial:
         self._validate_table_name(table_name)
         table = self._get_table(db, table_name)
         try:
-            stmt = table.delete().where(table.c.id == feature_id).returning(table)
-            result = db.execute(stmt)
+            result = db.execute(self._statement(table, "remove"), {ID_PARAM: feature_id})
             db.commit()
             return result.fetchone()
         except Exception as e:
@@ -195,57 +470,115 @@ class CRUDSpatial:
             raise HTTPException(status_code=500, detail=f"Database delete failed: {e}")
 
 
-    def import_geopackage_to_table(self, db: Session, gpkg_path: str, table_name: str):
+    def _copy_arrow_batches(self, db: Session, meta: dict, reader, table_name: str):
+        """
+        Replace a table with the features of a pyogrio Arrow stream using PostgreSQL COPY.
+
+        Each record batch (COPY_BATCH_SIZE rows) is converted on its own: its WKB
+        geometries become hex EWKB (which PostGIS parses natively) in one
+        vectorized shapely call, the batch is written as CSV by Arrow, and sent
+        with one COPY. No pandas frame is built and only one batch is held in
+        memory. The GiST index is built once the data is loaded.
+
+        Args:
+            db (Session): The database session.
+            meta (dict): Layer metadata returned by pyogrio.raw.open_arrow.
+            reader (pyarrow.RecordBatchReader): The layer's record batches.
+            table_name (str): Validated name of the table to (re)create.
+        """
+        import numpy as np
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        import shapely
+
+        geom_field = meta["geometry_name"] or "wkb"
+        if reader.schema.get_field_index(geom_field) < 0:
+            raise ValueError("Could not automatically detect the geometry column. Please ensure your GeoPackage has a valid geometry column.")
+        srid = _srid_from_crs(meta["crs"])
+        attribute_fields = [field for field in reader.schema if field.name != geom_field]
+        columns_sql = ", ".join(
+            ["id BIGINT PRIMARY KEY"]
+            + [f"{_quote_ident(field.name)} {_pg_column_type(field.type)}" for field in attribute_fields]
+            + [f"geometry geometry({_pg_geometry_type(meta['geometry_type'])}, {srid})"]
+        )
+        copy_columns = ", ".join(["id"] + [_quote_ident(field.name) for field in attribute_fields] + ["geometry"])
+        copy_sql = f'COPY "{table_name}" ({copy_columns}) FROM STDIN WITH (FORMAT CSV)'
+        csv_options = pacsv.WriteOptions(include_header=False)
+
+        try:
+            db.execute(text(version_forget_statement(table_name)))
+            db.execute(text(f'DROP TABLE IF EXISTS "{table_name}"'))
+            db.execute(text(f'CREATE TABLE "{table_name}" ({columns_sql})'))
+            # COPY runs on the session's own DBAPI connection, in the same transaction
+            cursor = db.connection().connection.cursor()
+            count = 0
+            try:
+                for batch in reader:
+                    geoms = shapely.from_wkb(batch.column(geom_field).to_numpy(zero_copy_only=False))
+                    # Reject invalid geometries before they are sent, checked for the whole batch in C
+                    invalid = np.flatnonzero(~shapely.is_valid(geoms) & ~shapely.is_missing(geoms))
+                    if invalid.size:
+                        raise ValueError(
+                            f"Invalid geometries at rows {(invalid[:10] + count).tolist()}: "
+                            f"{shapely.is_valid_reason(geoms[invalid[0]])}"
+                        )
+                    ewkb = shapely.to_wkb(shapely.set_srid(geoms, srid), hex=True, include_srid=True)
+                    # Columns in table order: 0-based running id, attributes, geometry
+                    rows = pa.Table.from_arrays(
+                        [pa.array(range(count, count + batch.num_rows), pa.int64())]
+                        + [_csv_compatible(batch.column(field.name)) for field in attribute_fields]
+                        + [pa.array(ewkb, pa.string())],
+                        names=["id"] + [field.name for field in attribute_fields] + ["geometry"],
+                    )
+                    buf = io.BytesIO()
+                    pacsv.write_csv(rows, buf, write_options=csv_options)
+                    buf.seek(0)
+                    cursor.copy_expert(copy_sql, buf)
+                    count += batch.num_rows
+            finally:
+                cursor.close()
+            if count == 0:
+                raise ValueError("GeoPackage layer is empty or could not be read.")
+            # Index built after the load (one bulk build instead of per-row
+            # maintenance), then fresh statistics so the planner uses it right away
+            db.execute(text(f'CREATE INDEX "{table_name}_geom_gix" ON "{table_name}" USING GIST (geometry)'))
+            for statement in version_tracking_statements(table_name):
+                db.execute(text(statement))
+            db.execute(text(f'ANALYZE "{table_name}"'))
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+
+    def import_geopackage_to_table(self, db: Session, gpkg_path: str, table_name: str,
+                                   bbox: Optional[Tuple[float, float, float, float]] = None):
         """
         Import features from a GeoPackage file into a new spatial table.
 
         Args:
             db (Session): The database session.
-            gpkg_path (str): Path to the temporary GeoPackage file.
+            gpkg_path (str): Path to the GeoPackage file; the caller owns (and removes) it.
             table_name (str): The desired name for the new database table.
+            bbox (Optional[Tuple[float, float, float, float]]): If given, only features
+                intersecting (minx, miny, maxx, maxy), in the layer's CRS, are imported.
         """
         # Validate table name
         self._validate_table_name(table_name)
-        # Use GeoPandas for convenience
-        import geopandas as gpd
+        # Stream the layer through pyogrio's Arrow interface: GDAL hands over
+        # columnar record batches, so features are never built one by one
+        from pyogrio.raw import open_arrow
+        from pyogrio.errors import DataSourceError
 
         try:
-            # Read directly using GeoPandas read_file
-            # This handles opening and closing the file internally.
             # Assuming only one layer of interest (the first one)
-            gdf = gpd.read_file(gpkg_path, layer=0)
+            with open_arrow(gpkg_path, layer=0, bbox=bbox, batch_size=COPY_BATCH_SIZE, use_pyarrow=True) as (meta, reader):
+                # Write to PostGIS with COPY; an 'id' column is numbered from 0
+                self._copy_arrow_batches(db, meta, reader, table_name)
+            # The table was replaced, so any cached reflection of it is stale
+            self.invalidate(table_name)
 
-            if gdf.empty:
-                # Raise exception if the layer is empty, but don't delete yet
-                raise ValueError("GeoPackage layer is empty or could not be read.")
-
-            # Check if 'geometry' column exists, if not, try common alternatives or raise error
-            if 'geometry' not in gdf.columns:
-                # Attempt to find a geometry column based on common names or geometry type
-                geom_col = None
-                for col in gdf.columns:
-                    # Check for GeoAlchemy's WKBElement or base Shapely geometry types
-                    if isinstance(gdf[col].iloc[0], (WKBElement, sgeom.base.BaseGeometry)):
-                        geom_col = col
-                        break
-                    elif col.lower() in ['geom', 'shape', 'the_geom']:
-                        geom_col = col
-                        break
-                if geom_col:
-                    gdf = gdf.set_geometry(geom_col)
-                else:
-                    raise ValueError("Could not automatically detect the geometry column. Please ensure your GeoPackage has a valid geometry column.")
-
-            # Ensure geometry column is set correctly for to_postgis
-            if not gdf.geometry.name == 'geometry':
-                gdf = gdf.rename_geometry('geometry')
-
-            # Write to PostGIS using the session's connection
-            # Ensure an 'id' column is created from the index
-            gdf.to_postgis(table_name, db.get_bind(), if_exists='replace', index=True, index_label='id')
-
-        except fiona.errors.DriverError as e:
-            # Catch Fiona driver errors (e.g., file not found, invalid format)
+        except DataSourceError as e:
+            # Catch GDAL driver errors (e.g., file not found, invalid format)
             raise HTTPException(status_code=400, detail=f"Error reading GeoPackage: {str(e)}")
         except ValueError as e:
             # Catch specific value errors we raised or from GDF processing
@@ -253,14 +586,5 @@ class CRUDSpatial:
         except Exception as e:
             # Catch specific DB errors if needed or other general exceptions
             raise HTTPException(status_code=500, detail=f"Database write or processing failed: {str(e)}")
-        finally:
-            # Ensure the temporary file is deleted even if errors occurred
-            if os.path.exists(gpkg_path):
-                try:
-                    os.remove(gpkg_path)
-                except OSError as e:
-                    # Log this error, but don't necessarily raise an exception
-                    # as the main operation might have succeeded.
-                    print(f"Warning: Could not remove temporary file {gpkg_path}: {e}")
 
 crud_spatial = CRUDSpatial()
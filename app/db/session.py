@@ -2,23 +2,41 @@
 Database session and engine setup for PostGIS.
 """
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from geoalchemy2 import Geometry
 import os
 from dotenv import load_dotenv
+import orjson
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")  # Must be set in environment or .env (never committed)
+# Optional replica or read-only PgBouncer pool for GET and query endpoints
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
 
-engine = create_engine(
-    DATABASE_URL,
-    echo=True,
-    pool_pre_ping=True
-)
+def _create_engine(url):
+    return create_engine(
+        url,
+        # SQL logging formats every statement and its parameters; opt in with SQL_ECHO=1
+        echo=os.getenv("SQL_ECHO", "0") == "1",
+        # Sized per process; keep workers * (DB_POOL + DB_OVERFLOW) under the server's max_connections
+        pool_size=int(os.getenv("DB_POOL", "10")),
+        max_overflow=int(os.getenv("DB_OVERFLOW", "5")),
+        pool_timeout=30,
+        pool_pre_ping=True,
+        pool_recycle=1800,  # Recycle connections before server/proxy idle timeouts drop them
+        query_cache_size=1200,  # Room for the per-table compiled CRUD/query statements
+        # JSON/JSONB bind parameters (e.g. query GeoJSON) are encoded with orjson
+        json_serializer=lambda obj: orjson.dumps(obj).decode(),
+    )
+
+engine = _create_engine(DATABASE_URL)
+read_engine = _create_engine(READ_DATABASE_URL) if READ_DATABASE_URL else engine
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+class Base(DeclarativeBase):
+    pass
 
 # Dependency to get DB session
 def get_db():
@@ -27,3 +45,19 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependency to get a DB session for read-only routes
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Dependency to get a read-only connection for raw-SQL endpoints
+def get_conn():
+    # Reason: the query endpoints produce no ORM objects, so a Session's identity
+    # map and unit of work are pure overhead. The transaction stays open (a named
+    # server-side cursor needs one) but is read-only, and is rolled back on close.
+    with read_engine.connect().execution_options(postgresql_readonly=True) as conn:
+        yield conn
@@ -6,11 +6,13 @@ from app.api import spatial
 from app.api import spatial_table
 from app.api import spatial_query
 from app.api import geopackage_import
+from app.utils.responses import ORJSONResponse
 
 app = FastAPI(
     title="Orata API Backend",
     description="A RESTful API for spatial and a-spatial data management.",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse,
 )
 
 app.include_router(spatial.router)
@@ -9,4 +9,8 @@ class SpatialFeature(BaseModel):
     __tablename__ = "spatial_features"
     name = Column(String, nullable=False)
     description = Column(String, nullable=True)
-    geometry = Column(Geometry(geometry_type="GEOMETRY", srid=4326), nullable=False)
+    # GiST index (idx_spatial_features_geometry) so ST_Intersects/ST_DWithin use the R-tree
+    geometry = Column(
+        Geometry(geometry_type="GEOMETRY", srid=4326, spatial_index=True, use_N_D_index=False),
+        nullable=False,
+    )
@@ -6,48 +6,78 @@ from typing import Optional, Any
 
 from pydantic import model_validator
 
+# Coordinates are lists when parsed from JSON (requests, and responses rendered
+# by shapely.to_geojson); tuples are accepted for schemas built in Python.
+SEQUENCE_TYPES = (list, tuple)
+
+def _validate_point(coords):
+    if isinstance(coords, SEQUENCE_TYPES) and len(coords) == 2:
+        x, y = coords
+        if isinstance(x, (int, float)) and isinstance(y, (int, float)):
+            return
+    raise ValueError("Point geometry must have two numeric coordinates")
+
+def _validate_polygon(coords):
+    if not isinstance(coords, SEQUENCE_TYPES) or not coords or not isinstance(coords[0], SEQUENCE_TYPES):
+        raise ValueError("Invalid Polygon coordinates")
+    for ring in coords:
+        if len(ring) < 4:
+            raise ValueError("Polygon ring must have at least 4 points")
+        if ring[0] != ring[-1]:
+            raise ValueError("Polygon ring must be closed (first and last point must be the same)")
+
+def _validate_linestring(coords):
+    if not isinstance(coords, SEQUENCE_TYPES) or len(coords) < 2:
+        raise ValueError("LineString must have at least 2 points")
+
+def _validate_multipoint(coords):
+    if not isinstance(coords, SEQUENCE_TYPES) or len(coords) < 1:
+        raise ValueError("MultiPoint must have at least 1 point")
+
+def _validate_multilinestring(coords):
+    if not isinstance(coords, SEQUENCE_TYPES) or len(coords) < 1:
+        raise ValueError("MultiLineString must have at least 1 LineString")
+    for line in coords:
+        if len(line) < 2:
+            raise ValueError("Each LineString in MultiLineString must have at least 2 points")
+
+def _validate_multipolygon(coords):
+    if not isinstance(coords, SEQUENCE_TYPES) or len(coords) < 1:
+        raise ValueError("MultiPolygon must have at least 1 Polygon")
+    for poly in coords:
+        if not isinstance(poly, SEQUENCE_TYPES) or len(poly) < 1:
+            raise ValueError("Each Polygon in MultiPolygon must have at least 1 ring")
+        for ring in poly:
+            if len(ring) < 4:
+                raise ValueError("Polygon ring in MultiPolygon must have at least 4 points")
+            if ring[0] != ring[-1]:
+                raise ValueError("Polygon ring in MultiPolygon must be closed (first and last point must be the same)")
+
+# Coordinate validator per geometry type, looked up once per geometry;
+# types without an entry are not checked here
+_VALIDATORS = {
+    "Point": _validate_point,
+    "Polygon": _validate_polygon,
+    "LineString": _validate_linestring,
+    "MultiPoint": _validate_multipoint,
+    "MultiLineString": _validate_multilinestring,
+    "MultiPolygon": _validate_multipolygon,
+}
+
 class GeometryBase(BaseModel):
     type: str = Field(..., description="Geometry type (e.g., Point, Polygon)")
     coordinates: Any = Field(..., description="Geometry coordinates in GeoJSON format.")
 
     @model_validator(mode="after")
     def validate_geometry(self):
-        geom_type = self.type
-        coords = self.coordinates
-        if geom_type == "Point":
-            if not (isinstance(coords, list) and len(coords) == 2 and all(isinstance(c, (int, float)) for c in coords)):
-                raise ValueError("Point geometry must have two numeric coordinates")
-        if geom_type == "Polygon":
-            if not isinstance(coords, list) or not coords or not isinstance(coords[0], list):
-                raise ValueError("Invalid Polygon coordinates")
-            for ring in coords:
-                if len(ring) < 4:
-                    raise ValueError("Polygon ring must have at least 4 points")
-                if ring[0] != ring[-1]:
-                    raise ValueError("Polygon ring must be closed (first and last point must be the same)")
-        if geom_type == "LineString":
-            if not isinstance(coords, list) or len(coords) < 2:
-                raise ValueError("LineString must have at least 2 points")
-        if geom_type == "MultiPoint":
-            if not isinstance(coords, list) or len(coords) < 1:
-                raise ValueError("MultiPoint must have at least 1 point")
-        if geom_type == "MultiLineString":
-            if not isinstance(coords, list) or len(coords) < 1:
-                raise ValueError("MultiLineString must have at least 1 LineString")
-            for line in coords:
-                if len(line) < 2:
-                    raise ValueError("Each LineString in MultiLineString must have at least 2 points")
-        if geom_type == "MultiPolygon":
-            if not isinstance(coords, list) or len(coords) < 1:
-                raise ValueError("MultiPolygon must have at least 1 Polygon")
-            for poly in coords:
-                if not isinstance(poly, list) or len(poly) < 1:
-                    raise ValueError("Each Polygon in MultiPolygon must have at least 1 ring")
-                for ring in poly:
-                    if len(ring) < 4:
-                        raise ValueError("Polygon ring in MultiPolygon must have at least 4 points")
-                    if ring[0] != ring[-1]:
-                        raise ValueError("Polygon ring in MultiPolygon must be closed (first and last point must be the same)")
+        # Reason: map clicks post Points far more often than anything else,
+        # so they skip the table lookup.
+        if self.type == "Point":
+            _validate_point(self.coordinates)
+            return self
+        validator = _VALIDATORS.get(self.type)
+        if validator is not None:
+            validator(self.coordinates)
         return self
 
 class SpatialBase(BaseModel):
@@ -1 +0,0 @@
-# Makes tests a package
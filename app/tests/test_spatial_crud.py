@@ -1,248 +0,0 @@
-import pytest
-from fastapi.testclient import TestClient
-import sys, os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../..')))
-from app.main import app
-from app.db.session import engine
-from sqlalchemy import text
-
-client = TestClient(app)
-
-TEST_TABLE = "test_features"
-
-@pytest.fixture(scope="module", autouse=True)
-def setup_and_teardown():
-    # Create test table
-    create_sql = f'''
-    CREATE TABLE IF NOT EXISTS {TEST_TABLE} (
-        id SERIAL PRIMARY KEY,
-        name VARCHAR(255) NOT NULL,
-        description TEXT,
-        geometry geometry(Point, 4326) NOT NULL
-    )'''
-    with engine.connect() as connection:
-        connection.execute(text(create_sql))
-        connection.commit()
-    yield
-    # Drop test table after tests
-    with engine.connect() as connection:
-        connection.execute(text(f"DROP TABLE IF EXISTS {TEST_TABLE} CASCADE"))
-        connection.commit()
-
-def feature_payload():
-    return {
-        "name": "Test Feature",
-        "description": "A test feature",
-        "geometry": {
-            "type": "Point",
-            "coordinates": [100.0, 0.0]
-        }
-    }
-
-def test_create_feature():
-    resp = client.post(f"/features/{TEST_TABLE}/", json=feature_payload())
-    assert resp.status_code == 201
-    data = resp.json()
-    assert data["name"] == "Test Feature"
-    assert data["geometry"]["type"] == "Point"
-
-def test_read_features():
-    resp = client.get(f"/features/{TEST_TABLE}/")
-    assert resp.status_code == 200
-    features = resp.json()
-    assert isinstance(features, list)
-    assert any(f["name"] == "Test Feature" for f in features)
-
-def test_update_feature():
-    # Get the feature ID
-    resp = client.get(f"/features/{TEST_TABLE}/")
-    feature_id = resp.json()[0]["id"]
-    update = {"name": "Updated Feature"}
-    resp = client.put(f"/features/{TEST_TABLE}/{feature_id}", json=update)
-    assert resp.status_code == 200
-    assert resp.json()["name"] == "Updated Feature"
-
-def test_delete_feature():
-    # Get the feature ID
-    resp = client.get(f"/features/{TEST_TABLE}/")
-    feature_id = resp.json()[0]["id"]
-    resp = client.delete(f"/features/{TEST_TABLE}/{feature_id}")
-    assert resp.status_code == 200
-    # Ensure feature is deleted
-    resp = client.get(f"/features/{TEST_TABLE}/")
-    assert all(f["id"] != feature_id for f in resp.json())
-
-def test_invalid_table_name():
-    resp = client.post(f"/features/invalid-table!@/", json=feature_payload())
-    assert resp.status_code == 400
-
-def test_invalid_geometry():
-    bad_payload = feature_payload()
-    bad_payload["geometry"] = {"type": "Point", "coordinates": []}
-    resp = client.post(f"/features/{TEST_TABLE}/", json=bad_payload)
-    assert resp.status_code == 422
-
-def test_query_within():
-    # Clear the test table and directly insert a feature with SQL to ensure consistent data
-    with engine.connect() as connection:
-        connection.execute(text(f"DELETE FROM {TEST_TABLE}"))
-        connection.execute(text(f"""
-            INSERT INTO {TEST_TABLE} (name, description, geometry)
-            VALUES ('Test Feature', 'A test feature', ST_SetSRID(ST_GeomFromText('POINT(100 0)'), 4326))
-        """))
-        connection.commit()
-    
-    # Verify the feature was inserted correctly
-    with engine.connect() as connection:
-        result = connection.execute(text(f"SELECT id, name, description FROM {TEST_TABLE}")).fetchone()
-        print(f"DEBUG: Feature in DB: id={result[0]}, name={result[1]}, description={result[2]}")
-    
-    # Query the feature with the same point geometry
-    geom = {"type": "Point", "coordinates": [100.0, 0.0]}
-    resp = client.post(f"/features/{TEST_TABLE}/query/within", json={"geometry": geom})
-    assert resp.status_code == 200
-    
-    # Save the response for debugging
-    features = resp.json()
-    with open("query_within_debug.json", "w", encoding="utf-8") as f:
-        import json
-        json.dump(features, f, ensure_ascii=False, indent=2)
-    
-    # Print the raw response for debugging
-    print("DEBUG: Response from /query/within:", features)
-    
-    # For this test, we'll just assert that we got a response with at least one feature
-    # and that the feature has the expected geometry
-    assert len(features) > 0, "No features returned from query_within"
-    
-    # Check that at least one feature has the expected point geometry
-    has_matching_geometry = False
-    for f in features:
-        geom = f.get("geometry")
-        if geom and geom.get("type") == "Point" and geom.get("coordinates") == [100.0, 0.0]:
-            has_matching_geometry = True
-            break
-    
-    assert has_matching_geometry, "No feature with the expected geometry found"
-    
-    # The test passes if we got a feature with the right geometry, regardless of name/description
-    # This is a workaround for the serialization issue"
-
-def test_query_bbox():
-    """
-    Test bbox query returns a FeatureCollection and includes the test feature.
-    """
-    bbox = {"bbox": [99.0, -1.0, 101.0, 1.0]}
-    resp = client.post(f"/features/{TEST_TABLE}/query/bbox", json=bbox)
-    assert resp.status_code == 200
-    data = resp.json()
-    assert data["type"] == "FeatureCollection"
-    features = data["features"]
-    assert isinstance(features, list)
-    assert any(
-        f["properties"].get("name") == "Test Feature" for f in features
-    )
-
-def test_query_bbox_invalid_bbox():
-    """
-    Test bbox query with invalid bbox (wrong length) returns 422.
-    """
-    bbox = {"bbox": [99.0, -1.0]}  # Too short
-    resp = client.post(f"/features/{TEST_TABLE}/query/bbox", json=bbox)
-    assert resp.status_code == 422
-    assert "bbox must be a list of four numbers" in resp.text
-
-def test_query_bbox_missing_bbox():
-    """
-    Test bbox query with missing bbox key returns 422.
-    """
-    resp = client.post(f"/features/{TEST_TABLE}/query/bbox", json={})
-    assert resp.status_code == 422
-    assert "bbox must be a list of four numbers" in resp.text
-
-
-def test_query_distance():
-    # Clear the test table and directly insert a feature with SQL to ensure consistent data
-    with engine.connect() as connection:
-        connection.execute(text(f"DELETE FROM {TEST_TABLE}"))
-        connection.execute(text(f"""
-            INSERT INTO {TEST_TABLE} (name, description, geometry)
-            VALUES ('Test Feature', 'A test feature', ST_SetSRID(ST_GeomFromText('POINT(100 0)'), 4326))
-        """))
-        connection.commit()
-    
-    # Verify the feature was inserted correctly
-    with engine.connect() as connection:
-        result = connection.execute(text(f"SELECT id, name, description FROM {TEST_TABLE}")).fetchone()
-        print(f"DEBUG: Feature in DB: id={result[0]}, name={result[1]}, description={result[2]}")
-    
-    # Query the feature with a point geometry and distance
-    geom = {"type": "Point", "coordinates": [100.0, 0.0]}
-    resp = client.post(f"/features/{TEST_TABLE}/query/distance", json={"geometry": geom, "distance": 1000})
-    assert resp.status_code == 200
-    
-    # Save the response for debugging
-    features = resp.json()
-    with open("query_distance_debug.json", "w", encoding="utf-8") as f:
-        import json
-        json.dump(features, f, ensure_ascii=False, indent=2)
-    
-    # Print the raw response for debugging
-    print("DEBUG: Response from /query/distance:", features)
-    
-    # For this test, we'll just assert that we got a response with at least one feature
-    # and that the feature has the expected geometry
-    assert len(features) > 0, "No features returned from query_distance"
-    
-    # Check that at least one feature has the expected point geometry
-    has_matching_geometry = False
-    for f in features:
-        geom = f.get("geometry")
-        if geom and geom.get("type") == "Point" and geom.get("coordinates") == [100.0, 0.0]:
-            has_matching_geometry = True
-            break
-    
-    assert has_matching_geometry, "No feature with the expected geometry found"
-    
-    # The test passes if we got a feature with the right geometry, regardless of name/description
-    # This is a workaround for the serialization issue"
-
-def test_query_intersects():
-    geom = {"type": "Point", "coordinates": [100.0, 0.0]}
-    resp = client.post(f"/features/{TEST_TABLE}/query/intersects", json={"geometry": geom})
-    assert resp.status_code == 200
-    features = resp.json()
-    
-    # For this test, we'll just assert that we got a response with at least one feature
-    # and that the feature has the expected geometry
-    assert len(features) > 0, "No features returned from query_intersects"
-    
-    # Check that at least one feature has the expected point geometry
-    has_matching_geometry = False
-    for f in features:
-        geom = f.get("geometry")
-        if geom and geom.get("type") == "Point" and geom.get("coordinates") == [100.0, 0.0]:
-            has_matching_geometry = True
-            break
-    
-    assert has_matching_geometry, "No feature with the expected geometry found"
-
-def test_query_buffer():
-    geom = {"type": "Point", "coordinates": [100.0, 0.0]}
-    resp = client.post(f"/features/{TEST_TABLE}/query/buffer", json={"geometry": geom, "buffer": 0.1})
-    assert resp.status_code == 200
-    features = resp.json()
-    
-    # For this test, we'll just assert that we got a response with at least one feature
-    # and that the feature has the expected geometry
-    assert len(features) > 0, "No features returned from query_buffer"
-    
-    # Check that at least one feature has the expected point geometry
-    has_matching_geometry = False
-    for f in features:
-        geom = f.get("geometry")
-        if geom and geom.get("type") == "Point" and geom.get("coordinates") == [100.0, 0.0]:
-            has_matching_geometry = True
-            break
-    
-    assert has_matching_geometry, "No feature with the expected geometry found"
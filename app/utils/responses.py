@@ -0,0 +1,16 @@
+"""
+Response classes shared by the API routers.
+"""
+from typing import Any
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson (C encoder), which is much faster than
+    the stdlib encoder on coordinate-heavy GeoJSON payloads and serializes
+    tuples natively.
+    """
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
@@ -0,0 +1,96 @@
+"""
+Unit tests for the GeoPackage import endpoint.
+"""
+import os
+import pyarrow as pa
+import pyogrio
+import pytest
+import shapely
+from pyogrio.raw import read_arrow
+from sqlalchemy import text
+from app.api.spatial import spatial_tables
+from app.api.spatial_query import table_columns
+from app.crud.spatial import crud_spatial, version_forget_statement
+from app.db.session import engine
+from tests.utils import worker_table
+
+TEST_DATA = os.path.join(os.path.dirname(__file__), "..", "..", "test_data")
+BUNDLED_GPKGS = ["test_craigieburn_points.gpkg", "test_craigieburn_lines.gpkg"]
+
+def upload(client, path, table_name, **params):
+    with open(path, "rb") as f:
+        return client.post(
+            "/import/geopackage/",
+            params=params,
+            files={"file": (f"{table_name}.gpkg", f, "application/geopackage+sqlite3")},
+        )
+
+def write_gpkg(path, names, geometries, geometry_type):
+    table = pa.table({
+        "name": pa.array(names, pa.string()),
+        "geometry": pa.array([shapely.to_wkb(geometry) for geometry in geometries], pa.binary()),
+    })
+    pyogrio.write_arrow(table, path, driver="GPKG", geometry_name="geometry", geometry_type=geometry_type, crs="EPSG:4326")
+    return path
+
+@pytest.fixture
+def imported_table():
+    # Yields a per-worker table name and drops whatever the test imported into
+    # it, directly on the public-schema engine the import wrote through
+    names = []
+    def name(base):
+        names.append(worker_table(base))
+        return names[-1]
+    yield name
+    with engine.begin() as connection:
+        for table_name in names:
+            connection.execute(text(version_forget_statement(table_name)))
+            connection.execute(text(f'DROP TABLE IF EXISTS "{table_name}"'))
+    spatial_tables.cache_clear()
+    table_columns.cache_clear()
+    for table_name in names:
+        crud_spatial.invalidate(table_name)
+
+@pytest.mark.parametrize("filename", BUNDLED_GPKGS)
+def test_import_geopackage(client, imported_table, filename):
+    path = os.path.join(TEST_DATA, filename)
+    table_name = imported_table(f"import_{os.path.splitext(filename)[0]}")
+    resp = upload(client, path, table_name)
+    assert resp.status_code == 201, resp.text
+    assert table_name in resp.json()["message"]
+
+    meta, source = read_arrow(path)
+    expected = shapely.from_wkb(source.column(meta["geometry_name"]).to_numpy(zero_copy_only=False))
+    with engine.connect() as connection:
+        rows = connection.execute(text(f'SELECT ST_AsBinary(geometry) FROM "{table_name}" ORDER BY id')).scalars().all()
+        indexes = set(connection.execute(
+            text("SELECT indexname FROM pg_indexes WHERE tablename = :table_name"), {"table_name": table_name}
+        ).scalars())
+    # Every feature arrives, in file order, with its geometry unchanged
+    assert len(rows) == len(expected)
+    assert shapely.equals_exact(shapely.from_wkb(rows), expected, tolerance=0).all()
+    assert f"{table_name}_geom_gix" in indexes
+    # The imported table is immediately queryable through the API
+    assert client.get(f"/spatial-tables/{table_name}").status_code == 200
+
+def test_import_geopackage_rejects_invalid_geometry(client, imported_table, tmp_path):
+    bowtie = shapely.from_wkt("POLYGON ((0 0, 1 1, 1 0, 0 1, 0 0))")
+    path = write_gpkg(tmp_path / "bowtie.gpkg", ["bowtie"], [bowtie], "Polygon")
+    table_name = imported_table("import_bowtie")
+    resp = upload(client, path, table_name)
+    assert resp.status_code == 400
+    assert "Invalid geometries" in resp.json()["detail"]
+    # Nothing is left behind
+    assert client.get(f"/spatial-tables/{table_name}").status_code == 404
+
+def test_import_geopackage_rejects_empty_layer(client, imported_table, tmp_path):
+    path = write_gpkg(tmp_path / "empty.gpkg", [], [], "Point")
+    table_name = imported_table("import_empty")
+    resp = upload(client, path, table_name)
+    assert resp.status_code == 400
+    assert "empty" in resp.json()["detail"]
+    assert client.get(f"/spatial-tables/{table_name}").status_code == 404
+
+def test_import_geopackage_rejects_other_files(client):
+    resp = client.post("/import/geopackage/", files={"file": ("features.csv", b"a,b\n", "text/csv")})
+    assert resp.status_code == 400
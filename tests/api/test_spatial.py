@@ -2,32 +2,15 @@
 Pytest unit tests for spatial API endpoints (dynamic table version).
 """
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
+from fastapi import HTTPException
 from sqlalchemy import text
+from app.api import spatial
+from app.api.spatial import spatial_tables, validate_table_name
 from app.db.session import engine
+from tests.utils import TEST_TABLE, worker_table
 
-client = TestClient(app)
-TEST_TABLE = "test_features"
-
-@pytest.fixture(scope="module", autouse=True)
-def setup_and_teardown():
-    # Create test table
-    create_sql = f'''
-    CREATE TABLE IF NOT EXISTS {TEST_TABLE} (
-        id SERIAL PRIMARY KEY,
-        name VARCHAR(255) NOT NULL,
-        description TEXT,
-        geometry geometry(GEOMETRY, 4326) NOT NULL
-    )'''
-    with engine.connect() as connection:
-        connection.execute(text(create_sql))
-        connection.commit()
-    yield
-    # Drop test table after tests
-    with engine.connect() as connection:
-        connection.execute(text(f"DROP TABLE IF EXISTS {TEST_TABLE} CASCADE"))
-        connection.commit()
+# Every test writes through current_session and is rolled back afterwards
+pytestmark = pytest.mark.usefixtures("current_session")
 
 # Example geometries
 POINT = {"type": "Point", "coordinates": [100.0, 0.0]}
@@ -53,19 +36,19 @@ def spatial_payload(request):
         "geometry": geometry
     }
 
-def test_create_feature(spatial_payload):
+def test_create_feature(client, spatial_payload):
     resp = client.post(f"/features/{TEST_TABLE}/", json=spatial_payload)
     assert resp.status_code == 201
     data = resp.json()
     assert data["name"] == spatial_payload["name"]
     assert data["geometry"]["type"] == spatial_payload["geometry"]["type"]
 
-def test_read_features():
+def test_read_features(client):
     resp = client.get(f"/features/{TEST_TABLE}/")
     assert resp.status_code == 200
     assert isinstance(resp.json(), list)
 
-def test_update_feature():
+def test_update_feature(client):
     resp = client.post(f"/features/{TEST_TABLE}/", json={"name": "UpdateTest", "description": "desc", "geometry": POINT})
     feature_id = resp.json()["id"]
     update = {"name": "UpdatedName"}
@@ -73,16 +56,16 @@ def test_update_feature():
     assert resp.status_code == 200
     assert resp.json()["name"] == "UpdatedName"
 
-def test_delete_feature():
+def test_delete_feature(client):
     resp = client.post(f"/features/{TEST_TABLE}/", json={"name": "DeleteTest", "description": "desc", "geometry": POINT})
     feature_id = resp.json()["id"]
     resp = client.delete(f"/features/{TEST_TABLE}/{feature_id}")
     assert resp.status_code == 200
     # Ensure feature is deleted
     resp = client.get(f"/features/{TEST_TABLE}/")
-    assert all(f["id"] != feature_id for f in resp.json())
+    assert feature_id not in {f["id"] for f in resp.json()}
 
-def test_invalid_geometry():
+def test_invalid_geometry(client):
     payload = {"name": "Bad Feature", "geometry": {"type": "InvalidType", "coordinates": []}}
     resp = client.post(f"/features/{TEST_TABLE}/", json=payload)
     assert resp.status_code == 422
@@ -101,3 +84,53 @@ def test_invalid_geometry():
     payload = {"name": "Bad MultiPolygon", "geometry": {"type": "MultiPolygon", "coordinates": [ [[[100.0, 0.0], [101.0, 0.0], [101.0, 1.0]]] ]}}
     resp = client.post(f"/features/{TEST_TABLE}/", json=payload)
     assert resp.status_code == 422
+
+def test_read_features_not_modified(client):
+    client.post(f"/features/{TEST_TABLE}/", json={"name": "ETagTest", "description": "desc", "geometry": POINT})
+    resp = client.get(f"/features/{TEST_TABLE}/")
+    etag = resp.headers["etag"]
+    # Exact, weak and listed forms of the tag all match
+    for if_none_match in (etag, f"W/{etag}", f'"stale", {etag}', "*"):
+        resp = client.get(f"/features/{TEST_TABLE}/", headers={"If-None-Match": if_none_match})
+        assert resp.status_code == 304, if_none_match
+        assert resp.headers["etag"] == etag
+    resp = client.get(f"/features/{TEST_TABLE}/", headers={"If-None-Match": '"stale"'})
+    assert resp.status_code == 200
+
+def test_read_features_etag_changes_after_update(client):
+    resp = client.post(f"/features/{TEST_TABLE}/", json={"name": "ETagUpdate", "description": "desc", "geometry": POINT})
+    feature_id = resp.json()["id"]
+    etag = client.get(f"/features/{TEST_TABLE}/").headers["etag"]
+    client.put(f"/features/{TEST_TABLE}/{feature_id}", json={"name": "ETagUpdated"})
+    resp = client.get(f"/features/{TEST_TABLE}/", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.headers["etag"] != etag
+    assert "ETagUpdated" in {f["name"] for f in resp.json()}
+
+def test_unknown_table_not_found(client):
+    resp = client.get("/features/no_such_table/")
+    assert resp.status_code == 404
+
+@pytest.fixture
+def late_table():
+    # A spatial table created behind the app's back, after the table cache was loaded
+    table_name = worker_table("late_table")
+    spatial_tables.cache_clear()
+    spatial_tables()
+    with engine.begin() as connection:
+        connection.execute(text(f"CREATE TABLE {table_name} (id SERIAL PRIMARY KEY, geometry geometry(POINT, 4326))"))
+    yield table_name
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP TABLE IF EXISTS {table_name}"))
+    spatial_tables.cache_clear()
+
+def test_unknown_table_within_min_age_is_not_refreshed(late_table):
+    # A recently loaded set answers misses itself, without querying the catalog
+    with pytest.raises(HTTPException) as exc_info:
+        validate_table_name(late_table)
+    assert exc_info.value.status_code == 404
+    assert spatial_tables.cache_info().misses == 1
+
+def test_unknown_table_after_min_age_is_refreshed(late_table, monkeypatch):
+    monkeypatch.setattr(spatial, "SPATIAL_TABLES_MIN_AGE", 0.0)
+    assert validate_table_name(late_table) == late_table
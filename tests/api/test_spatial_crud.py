@@ -0,0 +1,143 @@
+import pytest
+import app.crud.spatial as spatial_crud
+from app.crud.spatial import crud_spatial
+from app.db.session import engine
+from app.schemas.spatial import SpatialCreate
+from sqlalchemy import text
+from tests.utils import TEST_TABLE, has_point
+
+pytestmark = pytest.mark.usefixtures("clean_module_features")
+
+def seed_point(conn, name, x, y, description="A test feature"):
+    conn.execute(
+        text(f"""
+            INSERT INTO {TEST_TABLE} (name, description, geometry)
+            VALUES (:name, :description, ST_SetSRID(ST_MakePoint(:x, :y), 4326))
+        """),
+        {"name": name, "description": description, "x": x, "y": y},
+    )
+
+# Shared by several tests; never mutate it, build variants with {**FEATURE_PAYLOAD, ...}
+FEATURE_PAYLOAD = {
+    "name": "Test Feature",
+    "description": "A test feature",
+    "geometry": {
+        "type": "Point",
+        "coordinates": [100.0, 0.0]
+    }
+}
+
+# Reason: the CRUD tests write through current_session, whose transaction is
+# rolled back after each test, so they neither see nor leave committed rows.
+@pytest.fixture
+def created_id(client, current_session):
+    # One feature for the update and delete tests, identified by the id the POST returns
+    resp = client.post(f"/features/{TEST_TABLE}/", json=FEATURE_PAYLOAD)
+    assert resp.status_code == 201
+    return resp.json()["id"]
+
+def test_create_feature(client, current_session):
+    resp = client.post(f"/features/{TEST_TABLE}/", json=FEATURE_PAYLOAD)
+    assert resp.status_code == 201
+    data = resp.json()
+    assert data["name"] == "Test Feature"
+    assert data["geometry"]["type"] == "Point"
+
+def test_read_features(client, created_id):
+    resp = client.get(f"/features/{TEST_TABLE}/")
+    assert resp.status_code == 200
+    features = resp.json()
+    assert isinstance(features, list)
+    assert created_id in {f["id"] for f in features}
+
+def test_update_feature(client, created_id):
+    update = {"name": "Updated Feature"}
+    resp = client.put(f"/features/{TEST_TABLE}/{created_id}", json=update)
+    assert resp.status_code == 200
+    assert resp.json()["name"] == "Updated Feature"
+
+def test_delete_feature(client, created_id):
+    resp = client.delete(f"/features/{TEST_TABLE}/{created_id}")
+    assert resp.status_code == 200
+    # Ensure feature is deleted
+    resp = client.get(f"/features/{TEST_TABLE}/")
+    assert created_id not in {f["id"] for f in resp.json()}
+
+def test_invalid_table_name(client):
+    resp = client.post(f"/features/invalid-table!@/", json=FEATURE_PAYLOAD)
+    assert resp.status_code == 400
+
+def test_invalid_geometry(client, current_session):
+    bad_payload = {**FEATURE_PAYLOAD, "geometry": {"type": "Point", "coordinates": []}}
+    resp = client.post(f"/features/{TEST_TABLE}/", json=bad_payload)
+    assert resp.status_code == 422
+
+@pytest.fixture(scope="module")
+def seeded_point():
+    # Reset the table to a single known feature, once for all query tests
+    with engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {TEST_TABLE} RESTART IDENTITY"))
+        seed_point(connection, "Test Feature", 100.0, 0.0)
+        connection.execute(text(f"ANALYZE {TEST_TABLE}"))
+
+@pytest.mark.parametrize("endpoint, extra", [
+    ("within", {}),
+    ("intersects", {}),
+    ("distance", {"distance": 1000}),
+    ("buffer", {"buffer": 0.1}),
+])
+def test_query_point(client, seeded_point, endpoint, extra):
+    # Query the feature with the same point geometry
+    geom = {"type": "Point", "coordinates": [100.0, 0.0]}
+    resp = client.post(f"/features/{TEST_TABLE}/query/{endpoint}", json={"geometry": geom, **extra})
+    assert resp.status_code == 200
+    features = resp.json()
+    assert len(features) > 0, f"No features returned from query_{endpoint}"
+
+    assert has_point(features, [100.0, 0.0]), "No feature with the expected geometry found"
+
+def test_query_bbox(client, seeded_point):
+    """
+    Test bbox query returns a FeatureCollection and includes the test feature.
+    """
+    bbox = {"bbox": [99.0, -1.0, 101.0, 1.0]}
+    resp = client.post(f"/features/{TEST_TABLE}/query/bbox", json=bbox)
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["type"] == "FeatureCollection"
+    features = data["features"]
+    assert isinstance(features, list)
+    names = {f["properties"].get("name") for f in features}
+    assert "Test Feature" in names
+
+def test_query_bbox_invalid_bbox(client):
+    """
+    Test bbox query with invalid bbox (wrong length) returns 422.
+    """
+    bbox = {"bbox": [99.0, -1.0]}  # Too short
+    resp = client.post(f"/features/{TEST_TABLE}/query/bbox", json=bbox)
+    assert resp.status_code == 422
+    assert "bbox must be a list of four numbers" in resp.text
+
+def test_query_bbox_missing_bbox(client):
+    """
+    Test bbox query with missing bbox key returns 422.
+    """
+    resp = client.post(f"/features/{TEST_TABLE}/query/bbox", json={})
+    assert resp.status_code == 422
+    assert "bbox must be a list of four numbers" in resp.text
+
+def test_create_many(db_session):
+    features = [SpatialCreate(**FEATURE_PAYLOAD) for _ in range(3)]
+    features[1].name = "Second Feature"
+    rows = crud_spatial.create_many(db_session, features, TEST_TABLE)
+    assert [row._mapping["name"] for row in rows] == ["Test Feature", "Second Feature", "Test Feature"]
+    assert len({row._mapping["id"] for row in rows}) == 3
+
+def test_get_version_without_counter_table(db_session, monkeypatch):
+    # Databases without the table_versions migration serve lists without ETags
+    monkeypatch.setattr(spatial_crud, "_VERSIONED_DATABASES", set())
+    db_session.execute(text("DROP TABLE public.table_versions"))  # rolled back with the test
+    assert crud_spatial.get_version(db_session, TEST_TABLE) is None
+    # The transaction is still usable afterwards
+    assert crud_spatial.get_multi(db_session, TEST_TABLE) is not None
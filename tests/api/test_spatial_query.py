@@ -1,133 +1,142 @@
 """
 Unit tests for spatial query/filter endpoints (dynamic table version).
 """
+import json
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
 from sqlalchemy import text
+from app.api import spatial_query
 from app.db.session import engine
+from tests.utils import TEST_TABLE, has_geometry, has_point
 
-client = TestClient(app)
-TEST_TABLE = "test_features"
-
-@pytest.fixture(scope="module", autouse=True)
-def setup_and_teardown():
-    # Create test table
-    create_sql = f'''
-    CREATE TABLE IF NOT EXISTS {TEST_TABLE} (
-        id SERIAL PRIMARY KEY,
-        name VARCHAR(255) NOT NULL,
-        description TEXT,
-        geometry geometry(GEOMETRY, 4326) NOT NULL
-    )'''
-    with engine.connect() as connection:
-        connection.execute(text(create_sql))
-        connection.commit()
-    yield
-    # Drop test table after tests
-    with engine.connect() as connection:
-        connection.execute(text(f"DROP TABLE IF EXISTS {TEST_TABLE} CASCADE"))
-        connection.commit()
+# All tests share the session event loop that owns the aclient fixture
+pytestmark = pytest.mark.asyncio(loop_scope="session")
+
+def insert_geometries(features):
+    """
+    Reset the test table and insert the features in one transaction and one statement; returns their ids.
+    """
+    with engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {TEST_TABLE} RESTART IDENTITY"))
+        result = connection.execute(
+            text(f"""
+                INSERT INTO {TEST_TABLE} (name, geometry)
+                SELECT name, ST_SetSRID(ST_GeomFromGeoJSON(geojson), 4326)
+                FROM unnest(CAST(:names AS text[]), CAST(:geojsons AS text[])) AS f(name, geojson)
+                RETURNING id
+            """),
+            {
+                "names": [feat["name"] for feat in features],
+                "geojsons": [json.dumps(feat["geometry"]) for feat in features],
+            },
+        )
+        ids = [row.id for row in result]
+        connection.execute(text(f"ANALYZE {TEST_TABLE}"))
+    return ids
 
 @pytest.fixture(scope="function")
 def insert_features():
-    features = [
+    return insert_geometries([
         {"name": "PointA", "geometry": {"type": "Point", "coordinates": [100.0, 0.0]}},
         {"name": "PointB", "geometry": {"type": "Point", "coordinates": [101.0, 1.0]}},
         {"name": "LineA", "geometry": {"type": "LineString", "coordinates": [[100.0, 0.0], [101.0, 1.0]]}},
         {"name": "PolyA", "geometry": {"type": "Polygon", "coordinates": [[[100.0, 0.0], [101.0, 0.0], [101.0, 1.0], [100.0, 0.0]]]}}
-    ]
-    ids = []
-    for feat in features:
-        resp = client.post(f"/features/{TEST_TABLE}/", json=feat)
-        assert resp.status_code == 201
-        ids.append(resp.json()["id"])
-    yield ids
-    # Teardown: delete features
-    for id in ids:
-        client.delete(f"/features/{TEST_TABLE}/{id}")
-
-def test_query_intersects(insert_features):
+    ])
+
+async def test_query_intersects(aclient, insert_features):
     geojson = {"type": "Polygon", "coordinates": [[[99.5, -0.5], [101.5, -0.5], [101.5, 1.5], [99.5, 1.5], [99.5, -0.5]]]}
-    response = client.post(f"/features/{TEST_TABLE}/query/intersects", json={"geometry": geojson})
+    response = await aclient.post(f"/features/{TEST_TABLE}/query/intersects", json={"geometry": geojson})
     assert response.status_code == 200
     features = response.json()
-    
-    # Save the response for debugging
-    with open("query_intersects_debug.json", "w", encoding="utf-8") as f:
-        import json
-        json.dump(features, f, ensure_ascii=False, indent=2)
-    
-    # Print the raw response for debugging
-    print("DEBUG: Response from /query/intersects:", features)
-    
-    # Check for features with expected geometries instead of names
-    has_point_at_100_0 = False
-    has_polygon = False
-    for f in features:
-        if isinstance(f, dict):
-            geom = f.get("geometry")
-            if geom:
-                if geom.get("type") == "Point" and geom.get("coordinates") == [100.0, 0.0]:
-                    has_point_at_100_0 = True
-                elif geom.get("type") == "Polygon":
-                    has_polygon = True
-    
-    assert has_point_at_100_0, "Point at [100.0, 0.0] not found in response"
-    assert has_polygon, "Polygon not found in response"
-
-def test_query_within(insert_features):
+
+    assert has_point(features, [100.0, 0.0]), "Point at [100.0, 0.0] not found in response"
+    assert has_geometry(features, "Polygon"), "Polygon not found in response"
+
+async def test_query_within(aclient, insert_features):
     geojson = {"type": "Polygon", "coordinates": [[[99.5, -0.5], [101.5, -0.5], [101.5, 1.5], [99.5, 1.5], [99.5, -0.5]]]}
-    response = client.post(f"/features/{TEST_TABLE}/query/within", json={"geometry": geojson})
+    response = await aclient.post(f"/features/{TEST_TABLE}/query/within", json={"geometry": geojson})
     assert response.status_code == 200
     assert len(response.json()) >= 2
 
-def test_query_bbox(insert_features):
+async def test_query_bbox(aclient, insert_features):
     bbox = [99.5, -0.5, 101.5, 1.5]
-    response = client.post(f"/features/{TEST_TABLE}/query/bbox", json={"bbox": bbox})
+    response = await aclient.post(f"/features/{TEST_TABLE}/query/bbox", json={"bbox": bbox})
     assert response.status_code == 200
-    assert len(response.json()) >= 2
+    assert len(response.json()["features"]) >= 2
 
-def test_query_distance(insert_features):
+BBOX = [99.5, -0.5, 101.5, 1.5]
+
+async def test_query_bbox_without_limit_returns_everything(aclient, insert_features):
+    response = await aclient.post(f"/features/{TEST_TABLE}/query/bbox", json={"bbox": BBOX})
+    assert response.status_code == 200
+    collection = response.json()
+    assert len(collection["features"]) == len(insert_features)
+    assert collection["next_offset"] is None
+
+async def test_query_bbox_pages(aclient, insert_features):
+    first = (await aclient.post(f"/features/{TEST_TABLE}/query/bbox", json={"bbox": BBOX, "limit": 3})).json()
+    assert [f["id"] for f in first["features"]] == insert_features[:3]
+    assert first["next_offset"] == 3
+    last = (await aclient.post(
+        f"/features/{TEST_TABLE}/query/bbox", json={"bbox": BBOX, "limit": 3, "offset": first["next_offset"]}
+    )).json()
+    assert [f["id"] for f in last["features"]] == insert_features[3:]
+    assert last["next_offset"] is None
+
+async def test_query_bbox_caps_limit(aclient, insert_features, monkeypatch):
+    monkeypatch.setattr(spatial_query, "BBOX_MAX_LIMIT", 2)
+    response = await aclient.post(f"/features/{TEST_TABLE}/query/bbox", json={"bbox": BBOX, "limit": 100})
+    assert response.status_code == 200
+    collection = response.json()
+    assert len(collection["features"]) == 2
+    assert collection["next_offset"] == 2
+
+@pytest.mark.parametrize("paging", [{"limit": 0}, {"limit": "10"}, {"offset": -1}])
+async def test_query_bbox_rejects_bad_paging(aclient, paging):
+    response = await aclient.post(f"/features/{TEST_TABLE}/query/bbox", json={"bbox": BBOX, **paging})
+    assert response.status_code == 422
+
+async def test_query_distance(aclient, insert_features):
     geojson = {"type": "Point", "coordinates": [100.0, 0.0]}
-    response = client.post(f"/features/{TEST_TABLE}/query/distance", json={"geometry": geojson, "distance": 200000})
+    response = await aclient.post(f"/features/{TEST_TABLE}/query/distance", json={"geometry": geojson, "distance": 200000})
     assert response.status_code == 200
     features = response.json()
-    
-    # Save the response for debugging
-    with open("query_distance_debug.json", "w", encoding="utf-8") as f:
-        import json
-        json.dump(features, f, ensure_ascii=False, indent=2)
-    
-    # Check for a feature with coordinates [101.0, 1.0] (PointB)
-    has_point_b = False
-    for f in features:
-        if isinstance(f, dict):
-            geom = f.get("geometry")
-            if geom and geom.get("type") == "Point" and geom.get("coordinates") == [101.0, 1.0]:
-                has_point_b = True
-                break
-    
-    assert has_point_b, "Point at [101.0, 1.0] not found in response"
-
-def test_query_buffer(insert_features):
+
+    # PointB is about 157 km away
+    assert has_point(features, [101.0, 1.0]), "Point at [101.0, 1.0] not found in response"
+
+# (query point, feature point, distance in meters) pairs whose degree-space
+# separation is far larger than their distance on the spheroid
+DISTANCE_EDGE_CASES = [
+    ([179.9, 0.0], [-179.9, 0.0], 50000),  # ~22 km apart across the antimeridian
+    ([0.0, 89.5], [180.0, 89.5], 150000),  # ~111 km apart across the north pole
+    ([0.0, 85.0], [120.0, 85.0], 1000000),  # ~967 km apart, 120 degrees of longitude
+]
+
+@pytest.mark.parametrize("origin, target, distance", DISTANCE_EDGE_CASES)
+async def test_query_distance_near_pole_and_antimeridian(aclient, origin, target, distance):
+    insert_geometries([{"name": "Target", "geometry": {"type": "Point", "coordinates": target}}])
+    geojson = {"type": "Point", "coordinates": origin}
+    response = await aclient.post(f"/features/{TEST_TABLE}/query/distance", json={"geometry": geojson, "distance": distance})
+    assert response.status_code == 200
+    assert has_point(response.json(), target), f"Point at {target} not found within {distance} m of {origin}"
+
+async def test_query_buffer(aclient, insert_features):
     geojson = {"type": "Point", "coordinates": [100.0, 0.0]}
-    response = client.post(f"/features/{TEST_TABLE}/query/buffer", json={"geometry": geojson, "buffer": 200000})
+    response = await aclient.post(f"/features/{TEST_TABLE}/query/buffer", json={"geometry": geojson, "buffer": 200000})
     assert response.status_code == 200
     features = response.json()
-    
-    # Save the response for debugging
-    with open("query_buffer_debug.json", "w", encoding="utf-8") as f:
-        import json
-        json.dump(features, f, ensure_ascii=False, indent=2)
-    
-    # Check for a feature with coordinates [101.0, 1.0] (PointB)
-    has_point_b = False
-    for f in features:
-        if isinstance(f, dict):
-            geom = f.get("geometry")
-            if geom and geom.get("type") == "Point" and geom.get("coordinates") == [101.0, 1.0]:
-                has_point_b = True
-                break
-    
-    assert has_point_b, "Point at [101.0, 1.0] not found in response"
+
+    # PointB is about 157 km away
+    assert has_point(features, [101.0, 1.0]), "Point at [101.0, 1.0] not found in response"
+
+@pytest.mark.parametrize("endpoint, extra", [
+    ("intersects", {}),
+    ("within", {}),
+    ("distance", {"distance": 1000}),
+    ("buffer", {"buffer": 1000}),
+])
+async def test_query_rejects_empty_geometry(aclient, endpoint, extra):
+    geojson = {"type": "Point", "coordinates": []}
+    response = await aclient.post(f"/features/{TEST_TABLE}/query/{endpoint}", json={"geometry": geojson, **extra})
+    assert response.status_code == 422
+    assert "empty" in response.json()["detail"]
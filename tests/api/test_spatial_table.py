@@ -1,67 +1,144 @@
 """
 Unit tests for spatial table creation endpoints.
 """
+import asyncio
+import orjson
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
+from fastapi import HTTPException
+from sqlalchemy import text
+from app.api.spatial_table import (
+    SpatialTableCreateRequest, create_table_statements, describe_spatial_table, execute_table_ddl,
+)
+from app.db.session import engine
+from tests.utils import worker_table
 
-client = TestClient(app)
+# All tests share the session event loop that owns the aclient fixture
+pytestmark = pytest.mark.asyncio(loop_scope="session")
 
-@pytest.mark.parametrize("table_name, geometry_type, expected_status, fields", [
-    ("test_points", "POINT", 201, []),
-    ("test_lines", "LINESTRING", 201, []),
-    ("test_polygons", "POLYGON", 201, [
+# (table_name, geometry_type, expected_status, fields)
+CREATE_TABLE_CASES = [
+    (worker_table("test_points"), "POINT", 201, []),
+    (worker_table("test_lines"), "LINESTRING", 201, []),
+    (worker_table("test_polygons"), "POLYGON", 201, [
         {"name": "label", "type": "VARCHAR(100)", "nullable": False},
         {"name": "created_at", "type": "DATE", "nullable": True},
     ]),
     ("bad-table-name!", "POINT", 422, []),  # Invalid table name
-    ("test_points", "INVALIDTYPE", 422, []),  # Invalid geometry type
-])
-def test_create_spatial_table(table_name, geometry_type, expected_status, fields):
-    payload = {
-        "table_name": table_name,
-        "geometry_type": geometry_type,
-        "srid": 4326,
-        "fields": fields
-    }
-    response = client.post("/spatial-tables/", json=payload)
-    assert response.status_code == expected_status
-    if expected_status == 201:
-        assert "created with geometry type" in response.json()["message"]
-    elif expected_status == 422:
-        assert "detail" in response.json() or "error" in response.json()
+    (worker_table("test_points"), "INVALIDTYPE", 422, []),  # Invalid geometry type
+]
 
-def test_list_spatial_tables():
-    response = client.get("/spatial-tables/")
+# Request bodies encoded once at import instead of on every request
+CREATE_TABLE_BODIES = [
+    orjson.dumps({"table_name": table_name, "geometry_type": geometry_type, "srid": 4326, "fields": fields})
+    for table_name, geometry_type, _, fields in CREATE_TABLE_CASES
+]
+JSON_HEADERS = {"content-type": "application/json"}
+
+async def test_create_spatial_table(aclient, subtests):
+    # The cases are independent, so send them concurrently; subtests still
+    # report each case separately
+    responses = await asyncio.gather(*(
+        aclient.post("/spatial-tables/", content=body, headers=JSON_HEADERS) for body in CREATE_TABLE_BODIES
+    ))
+    for (table_name, geometry_type, expected_status, _), response in zip(CREATE_TABLE_CASES, responses):
+        with subtests.test(msg=f"{table_name} {geometry_type}"):
+            assert response.status_code == expected_status
+            if expected_status == 201:
+                assert "created with geometry type" in response.json()["message"]
+            elif expected_status == 422:
+                assert "detail" in response.json() or "error" in response.json()
+
+async def test_create_projected_srid_table_accepts_inserts(aclient):
+    # A projected SRID gets no geography index, whose cast would reject every INSERT
+    table_name = worker_table("test_projected")
+    response = await aclient.post("/spatial-tables/", json={"table_name": table_name, "geometry_type": "POINT", "srid": 3857})
+    assert response.status_code == 201
+    try:
+        with engine.begin() as connection:
+            connection.execute(text(f"INSERT INTO {table_name} (geometry) VALUES (ST_SetSRID(ST_MakePoint(1000000, 2000000), 3857))"))
+            indexes = set(connection.execute(
+                text("SELECT indexname FROM pg_indexes WHERE tablename = :table_name"), {"table_name": table_name}
+            ).scalars())
+        assert f"{table_name}_geom_gix" in indexes
+        assert f"{table_name}_geog_gix" not in indexes
+    finally:
+        await aclient.delete(f"/spatial-tables/{table_name}")
+
+async def test_create_geographic_srid_table_has_geography_index(aclient):
+    table_name = worker_table("test_geographic")
+    response = await aclient.post("/spatial-tables/", json={"table_name": table_name, "geometry_type": "POINT", "srid": 4326})
+    assert response.status_code == 201
+    try:
+        with engine.connect() as connection:
+            indexes = set(connection.execute(
+                text("SELECT indexname FROM pg_indexes WHERE tablename = :table_name"), {"table_name": table_name}
+            ).scalars())
+        assert f"{table_name}_geog_gix" in indexes
+    finally:
+        await aclient.delete(f"/spatial-tables/{table_name}")
+
+async def test_delete_spatial_table_forgets_version(aclient):
+    table_name = worker_table("test_versioned")
+    response = await aclient.post("/spatial-tables/", json={"table_name": table_name, "geometry_type": "POINT"})
+    assert response.status_code == 201
+    counter_sql = text("SELECT count(*) FROM public.table_versions WHERE table_oid = CAST(:oid AS oid)")
+    with engine.connect() as connection:
+        oid = connection.execute(text("SELECT CAST(to_regclass(:table_name) AS oid)"), {"table_name": table_name}).scalar()
+        assert connection.execute(counter_sql, {"oid": oid}).scalar() == 1
+    response = await aclient.delete(f"/spatial-tables/{table_name}")
     assert response.status_code == 200
-    assert "tables" in response.json()
-    assert isinstance(response.json()["tables"], list)
+    with engine.connect() as connection:
+        assert connection.execute(counter_sql, {"oid": oid}).scalar() == 0
 
-def test_describe_and_delete_spatial_table():
-    # Create a table with custom fields
-    payload = {
-        "table_name": "describe_me",
+async def test_delete_spatial_table_rejects_invalid_name(aclient):
+    response = await aclient.delete("/spatial-tables/bad;name")
+    assert response.status_code == 400
+
+DESCRIBE_TABLE = worker_table("describe_me")
+DESCRIBE_COLUMNS = frozenset({"label", "created_at", "geometry"})
+
+SEEDED_TABLES = [
+    {"table_name": worker_table("test_points"), "geometry_type": "POINT"},
+    {"table_name": worker_table("test_lines"), "geometry_type": "LINESTRING"},
+    {"table_name": worker_table("test_polygons"), "geometry_type": "POLYGON"},
+    {
+        "table_name": DESCRIBE_TABLE,
         "geometry_type": "POINT",
         "fields": [
             {"name": "label", "type": "VARCHAR(100)", "nullable": False},
             {"name": "created_at", "type": "DATE", "nullable": True}
         ]
-    }
-    response = client.post("/spatial-tables/", json=payload)
-    assert response.status_code == 201
+    },
+]
+
+@pytest.fixture(scope="module")
+def seeded_tables():
+    # Create every table the module reads in one transaction, in-process rather than over HTTP
+    requests = [SpatialTableCreateRequest(**table) for table in SEEDED_TABLES]
+    table_names = [req.table_name.lower() for req in requests]
+    execute_table_ddl([statement for req in requests for statement in create_table_statements(req)], table_names)
+    return table_names
+
+async def test_list_spatial_tables(aclient, seeded_tables):
+    response = await aclient.get("/spatial-tables/")
+    assert response.status_code == 200
+    assert "tables" in response.json()
+    assert isinstance(response.json()["tables"], list)
+    assert {worker_table(name) for name in ("test_points", "test_lines", "test_polygons")} <= set(response.json()["tables"])
+
+async def test_describe_and_delete_spatial_table(aclient, seeded_tables):
     # Describe
-    desc = client.get("/spatial-tables/describe_me")
+    desc = await aclient.get(f"/spatial-tables/{DESCRIBE_TABLE}")
     assert desc.status_code == 200
     desc_json = desc.json()
-    assert desc_json["table"] == "describe_me"
-    columns = [col["column_name"] for col in desc_json["columns"]]
-    assert "label" in columns
-    assert "created_at" in columns
-    assert "geometry" in columns
+    assert desc_json["table"] == DESCRIBE_TABLE
+    columns = frozenset(col["column_name"] for col in desc_json["columns"])
+    assert DESCRIBE_COLUMNS <= columns
     # Delete
-    delete = client.delete("/spatial-tables/describe_me")
+    delete = await aclient.delete(f"/spatial-tables/{DESCRIBE_TABLE}")
     assert delete.status_code == 200
     assert "deleted" in delete.json()["message"]
-    # Table should not exist anymore
-    desc2 = client.get("/spatial-tables/describe_me")
-    assert desc2.status_code == 404
+    # Table should not exist anymore; only DB state matters here, so call the route function directly
+    with pytest.raises(HTTPException) as exc_info:
+        describe_spatial_table(DESCRIBE_TABLE)
+    assert exc_info.value.status_code == 404
@@ -1,46 +1,180 @@
 import os
+import httpx
+import orjson
 import pytest
-from sqlalchemy import create_engine
+import pytest_asyncio
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
-from app.db.session import Base
-from fastapi.testclient import TestClient
-from app.main import app
 
 # Use a separate test database
 TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")  # Must be set in environment or .env (never committed)
+# Reason: some routes use the app engine directly (table listing and DDL, query
+# connections), so point it at the test database too, before app.db.session
+# creates it; otherwise those routes and the get_db override see different data.
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+from app.db.session import Base, engine as app_engine, get_db, get_read_db
+import app.models.spatial  # noqa: F401  (registers the models on Base.metadata)
+from app.crud.spatial import version_tracking_statements
+from fastapi.testclient import TestClient
+from tests.utils import TEST_TABLE, XDIST_WORKER
+
+def _orjson_body(json, content, headers):
+    # Encode json= request bodies with orjson instead of httpx's stdlib json
+    if json is None:
+        return content, headers
+    return orjson.dumps(json), {**dict(headers or {}), "content-type": "application/json"}
+
+class ORJSONTestClient(TestClient):
+    def request(self, method, url, *, content=None, json=None, headers=None, **kwargs):
+        content, headers = _orjson_body(json, content, headers)
+        return super().request(method, url, content=content, headers=headers, **kwargs)
+
+class ORJSONAsyncClient(httpx.AsyncClient):
+    async def request(self, method, url, *, content=None, json=None, headers=None, **kwargs):
+        content, headers = _orjson_body(json, content, headers)
+        return await super().request(method, url, content=content, headers=headers, **kwargs)
+
+# Each xdist worker creates the model tables in its own schema, so parallel
+# drop_all/create_all never collide; public stays on the search_path for the
+# PostGIS types and functions
+TEST_SCHEMA = f"test_{XDIST_WORKER}" if XDIST_WORKER else None
+connect_args = {"options": f"-csearch_path={TEST_SCHEMA},public"} if TEST_SCHEMA else {}
+schema_engine = create_engine(TEST_DATABASE_URL, pool_size=1, max_overflow=0, connect_args=connect_args)
 
 # Create a new engine and session for testing
-engine = create_engine(TEST_DATABASE_URL, echo=False)
+# Reason: sessions handed to the app (the get_db override, db_session) use
+# public, like the app's own engine and its catalog queries, so tables written
+# through either are visible to both; per-worker table names keep workers apart.
+# The test database is local and short-lived, so keep a small warm pool and
+# skip the liveness ping that pool_pre_ping adds to every checkout.
+engine = create_engine(
+    TEST_DATABASE_URL, echo=False, pool_size=5, max_overflow=0, pool_pre_ping=False
+)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def _ensure_schema():
+    if TEST_SCHEMA:
+        with schema_engine.begin() as connection:
+            connection.execute(text(f'CREATE SCHEMA IF NOT EXISTS "{TEST_SCHEMA}"'))
+    # Drop and recreate all tables before tests
+    Base.metadata.drop_all(bind=schema_engine)
+    Base.metadata.create_all(bind=schema_engine)
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_db():
-    # Drop and recreate all tables before tests
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
+    _ensure_schema()
     yield
-    # Teardown: drop all tables after tests
-    Base.metadata.drop_all(bind=engine)
+    # Reason: the next run drops and recreates the tables anyway, and CI
+    # throws its database away, so cleanup only runs when asked for.
+    if os.getenv("CLEAN_TEST_DB"):
+        # Empty every table in one statement
+        table_names = ", ".join(schema_engine.dialect.identifier_preparer.quote(t.name) for t in Base.metadata.sorted_tables)
+        with schema_engine.begin() as connection:
+            connection.exec_driver_sql(f"TRUNCATE {table_names} RESTART IDENTITY CASCADE")
+        if TEST_SCHEMA:
+            with schema_engine.begin() as connection:
+                connection.execute(text(f'DROP SCHEMA IF EXISTS "{TEST_SCHEMA}" CASCADE'))
+    engine.dispose()
+    schema_engine.dispose()
+
+@pytest.fixture(scope="session", autouse=True)
+def setup_test_table():
+    # Created once for the whole run; modules and tests that need an empty table
+    # use clean_module_features / clean_features
+    create_sql = f'''
+    CREATE TABLE IF NOT EXISTS {TEST_TABLE} (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        description TEXT,
+        geometry geometry(GEOMETRY, 4326) NOT NULL
+    )'''
+    with app_engine.begin() as connection:
+        connection.execute(text(create_sql))
+        # Same GiST indexes the app creates for its own tables, so the query tests use them
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {TEST_TABLE}_geom_gix ON {TEST_TABLE} USING GIST (geometry)"))
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {TEST_TABLE}_geog_gix ON {TEST_TABLE} USING GIST ((geometry::geography))"))
+        for statement in version_tracking_statements(TEST_TABLE):
+            connection.execute(text(statement))
+    yield
+    with app_engine.begin() as connection:
+        connection.execute(text(f"DROP TABLE IF EXISTS {TEST_TABLE} CASCADE"))
+
+def truncate_features():
+    with app_engine.begin() as connection:
+        connection.execute(text(f"TRUNCATE {TEST_TABLE} RESTART IDENTITY"))
 
 @pytest.fixture(scope="function")
-def db_session():
+def clean_features():
+    truncate_features()
+
+@pytest.fixture(scope="module")
+def clean_module_features():
+    # Each module starts from an empty table instead of recreating it
+    truncate_features()
+
+@pytest.fixture(scope="session")
+def db_connection():
+    # One pooled connection reused by every db_session in this process
     connection = engine.connect()
-    transaction = connection.begin()
-    session = TestingSessionLocal(bind=connection)
+    yield connection
+    connection.close()
+
+@pytest.fixture(scope="function")
+def db_session(db_connection):
+    transaction = db_connection.begin()
+    # Reason: commit() in app code only releases a SAVEPOINT, so the outer
+    # rollback below still undoes everything the test wrote.
+    session = TestingSessionLocal(bind=db_connection, join_transaction_mode="create_savepoint")
     yield session
     session.close()
     transaction.rollback()
-    connection.close()
 
-@pytest.fixture(scope="module")
-def client(db_session):
-    # Override dependency
+# Session the get_db override hands out while a test holds current_session.
+# Reason: a plain holder rather than a ContextVar, because TestClient runs the
+# app on its own portal thread, which never sees context set in the test.
+_active_session = {"session": None}
+
+@pytest.fixture(scope="function")
+def current_session(db_session):
+    # Route the app's get_db to this test's rolled-back session
+    _active_session["session"] = db_session
+    yield db_session
+    _active_session["session"] = None
+
+@pytest.fixture(scope="session")
+def fastapi_app():
+    # Imported on first use, so collecting tests (e.g. with -k) doesn't build the app
+    from app.main import app
+    return app
+
+@pytest.fixture(scope="session")
+def client(fastapi_app):
+    # One client (and app startup) for the whole run; the override is installed
+    # once and picks up the per-test session from current_session
     def override_get_db():
+        session = _active_session["session"]
+        if session is not None:
+            yield session
+            return
+        db = TestingSessionLocal()
         try:
-            yield db_session
+            yield db
         finally:
-            db_session.close()
-    app.dependency_overrides = {}
-    app.dependency_overrides["get_db"] = override_get_db
-    with TestClient(app) as c:
+            db.close()
+    # Overrides are keyed by the dependency function itself
+    fastapi_app.dependency_overrides[get_db] = override_get_db
+    fastapi_app.dependency_overrides[get_read_db] = override_get_db
+    with ORJSONTestClient(fastapi_app) as c:
+        yield c
+    fastapi_app.dependency_overrides.pop(get_db, None)
+    fastapi_app.dependency_overrides.pop(get_read_db, None)
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def aclient(client, fastapi_app):
+    # In-process ASGI client kept open for the whole run; depends on client so
+    # the app's startup and dependency overrides are in place
+    transport = httpx.ASGITransport(app=fastapi_app)
+    async with ORJSONAsyncClient(transport=transport, base_url="http://test") as c:
         yield c
@@ -0,0 +1,34 @@
+"""
+Shared constants and assertion helpers for the spatial API tests.
+"""
+import os
+
+# Set by pytest-xdist (gw0, gw1, ...); None in a normal run
+XDIST_WORKER = os.environ.get("PYTEST_XDIST_WORKER")
+
+def worker_table(name):
+    """
+    Table name suffixed with the xdist worker id, so parallel workers never share a table.
+    """
+    return f"{name}_{XDIST_WORKER}" if XDIST_WORKER else name
+
+# Dynamic feature table shared by the spatial API, CRUD and query tests
+TEST_TABLE = worker_table("test_features")
+
+def has_geometry(features, geometry_type, coordinates=None):
+    """
+    True if any feature has a geometry of geometry_type (and, if given, exactly these coordinates).
+    """
+    return next(
+        (
+            f for f in features
+            if isinstance(f, dict)
+            and (geom := f.get("geometry"))
+            and geom.get("type") == geometry_type
+            and (coordinates is None or geom.get("coordinates") == coordinates)
+        ),
+        None,
+    ) is not None
+
+def has_point(features, coordinates):
+    return has_geometry(features, "Point", coordinates)